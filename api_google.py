@@ -0,0 +1,248 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from loguru import logger
+
+
+# -------------------------------------------------------------------
+# 🚦 Chamadas ao Sheets/Drive com cota e novas tentativas
+# -------------------------------------------------------------------
+#
+# Toda chamada passa por `executar(servico, funcao, ...)`:
+#   - espera uma ficha do balde do serviço (cota por minuto da conta de serviço);
+#   - repete erros transitórios (429, 5xx, rede) com backoff exponencial e jitter.
+# As abas do gspread vêm embrulhadas em `AbaComCota` pelo get_aba() do autom.
+
+# Cotas por minuto (Sheets: 60 leituras e 60 escritas por usuário; Drive bem mais folgado)
+COTAS_PADRAO = {
+    "sheets_leitura": 60,
+    "sheets_escrita": 60,
+    "drive": 1200,
+}
+
+# Rajada permitida antes de começar a espaçar as chamadas
+RAJADA = 10
+
+TENTATIVAS = int(os.getenv("TENTATIVAS_API", 6))
+ESPERA_MAXIMA = 64.0
+
+STATUS_TRANSITORIOS = (429, 500, 502, 503, 504)
+MOTIVOS_DE_COTA = (b"rateLimitExceeded", b"userRateLimitExceeded")
+
+
+class BaldeDeFichas:
+    """Limite de taxa: `por_minuto` fichas por minuto, acumulando até `rajada`."""
+
+    def __init__(self, por_minuto, rajada=RAJADA):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = max(1.0, float(rajada))
+        self.fichas = self.capacidade
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        """Pega uma ficha, dormindo o que for preciso; devolve quanto esperou"""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self.fichas = min(self.capacidade, self.fichas + (agora - self._atualizado) * self.taxa)
+                self._atualizado = agora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return esperado
+                espera = (1 - self.fichas) / self.taxa
+            time.sleep(espera)
+            esperado += espera
+
+
+class _Contador:
+    def __init__(self):
+        self.chamadas = 0
+        self.novas_tentativas = 0
+        self.falhas = 0
+        self.espera_cota = 0.0
+        self.espera_backoff = 0.0
+
+
+_baldes = {}
+_contadores = {}
+_lock = threading.Lock()
+# Fichas já pagas por fichas_adiantadas(), por thread: {servico: quantidade}
+_adiantadas = threading.local()
+
+
+def _balde(servico):
+    with _lock:
+        if servico not in _baldes:
+            padrao = COTAS_PADRAO.get(servico, 60)
+            _baldes[servico] = BaldeDeFichas(float(os.getenv(f"COTA_{servico.upper()}_POR_MINUTO", padrao)))
+            _contadores[servico] = _Contador()
+        return _baldes[servico], _contadores[servico]
+
+
+def _status(erro):
+    """Status HTTP do erro do gspread (requests) ou do googleapiclient (httplib2)"""
+    resposta = getattr(erro, "response", None)
+    if resposta is None:
+        resposta = getattr(erro, "resp", None)
+    status = getattr(resposta, "status_code", None) or getattr(resposta, "status", None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def _espera_sugerida(erro):
+    """Retry-After da resposta, se houver"""
+    cabecalhos = getattr(getattr(erro, "response", None), "headers", None) or {}
+    try:
+        return float(cabecalhos.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def falha_transitoria(erro, idempotente=True):
+    """Vale tentar de novo? Escritas não idempotentes (append) só repetem em 429,
+    quando a requisição com certeza não foi aplicada."""
+    if isinstance(erro, (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout,
+                         requests.exceptions.ChunkedEncodingError)):
+        return idempotente
+    status = _status(erro)
+    if status == 429:
+        return True
+    if status == 403:
+        conteudo = getattr(erro, "content", b"") or b""
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode()
+        return any(motivo in conteudo for motivo in MOTIVOS_DE_COTA) or (
+            "rateLimitExceeded" in str(erro)
+        )
+    return idempotente and status in STATUS_TRANSITORIOS
+
+
+def executar(servico, funcao, *args, idempotente=True, **kwargs):
+    """Chama `funcao(*args, **kwargs)` respeitando a cota de `servico` e repetindo falhas transitórias"""
+    balde, contador = _balde(servico)
+    for tentativa in range(1, TENTATIVAS + 1):
+        fichas = getattr(_adiantadas, "fichas", {})
+        if tentativa == 1 and fichas.get(servico):
+            fichas[servico] -= 1
+            esperado = 0.0
+        else:
+            esperado = balde.aguardar()
+        with _lock:
+            contador.chamadas += 1
+            contador.espera_cota += esperado
+        try:
+            return funcao(*args, **kwargs)
+        except Exception as e:
+            if tentativa == TENTATIVAS or not falha_transitoria(e, idempotente):
+                with _lock:
+                    contador.falhas += 1
+                raise
+            espera = _espera_sugerida(e) or random.uniform(0, min(ESPERA_MAXIMA, 2 ** tentativa))
+            with _lock:
+                contador.novas_tentativas += 1
+                contador.espera_backoff += espera
+            nome = getattr(funcao, "__name__", "chamada")
+            logger.warning(f"{servico}.{nome} falhou ({e}); tentativa {tentativa + 1} em {espera:.1f}s.")
+            time.sleep(espera)
+
+
+@contextmanager
+def fichas_adiantadas(*servicos):
+    """Paga a cota antes: uma ficha por item de `servicos`, usadas pelas próximas
+    chamadas desta thread a esses serviços, que então não esperam.
+
+    Para trechos em que o tempo entre uma chamada e outra importa (a reserva
+    "grava e confere" da planilha). As fichas não usadas se perdem no fim do bloco.
+    """
+    fichas = {}
+    for servico in servicos:
+        balde, contador = _balde(servico)
+        esperado = balde.aguardar()
+        with _lock:
+            contador.espera_cota += esperado
+        fichas[servico] = fichas.get(servico, 0) + 1
+    anteriores = getattr(_adiantadas, "fichas", {})
+    _adiantadas.fichas = fichas
+    try:
+        yield
+    finally:
+        _adiantadas.fichas = anteriores
+
+
+def contadores():
+    """{servico: {chamadas, novas_tentativas, falhas, espera_cota, espera_backoff}}"""
+    with _lock:
+        return {
+            servico: {
+                "chamadas": c.chamadas,
+                "novas_tentativas": c.novas_tentativas,
+                "falhas": c.falhas,
+                "espera_cota": round(c.espera_cota, 3),
+                "espera_backoff": round(c.espera_backoff, 3),
+            }
+            for servico, c in sorted(_contadores.items())
+        }
+
+
+def resumo():
+    linhas = ["Chamadas às APIs do Google:"]
+    for servico, c in contadores().items():
+        linhas.append(
+            f"  {servico}: {c['chamadas']} chamada(s), {c['novas_tentativas']} nova(s) tentativa(s), "
+            f"{c['falhas']} falha(s), {c['espera_cota']:.1f}s esperando cota, {c['espera_backoff']:.1f}s em backoff"
+        )
+    return "\n".join(linhas)
+
+
+def reiniciar_contadores():
+    with _lock:
+        for servico in _contadores:
+            _contadores[servico] = _Contador()
+
+
+# -------------------------------------------------------------------
+# 📋 Worksheet do gspread com cota
+# -------------------------------------------------------------------
+
+LEITURAS = {"get_all_records", "get_all_values", "get_values", "batch_get", "row_values", "col_values", "acell", "cell"}
+ESCRITAS = {"update", "update_cell", "update_acell", "batch_update", "batch_clear", "clear"}
+# Repetir depois de um 5xx pode duplicar a linha: só 429 é repetido
+ESCRITAS_NAO_IDEMPOTENTES = {"append_row", "append_rows", "insert_row", "insert_rows", "delete_rows"}
+
+
+class AbaComCota:
+    """Embrulha uma Worksheet: leituras e escritas passam pelo `executar()`"""
+
+    def __init__(self, aba):
+        self._aba = aba
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._aba, nome)
+        if nome in LEITURAS:
+            servico, idempotente = "sheets_leitura", True
+        elif nome in ESCRITAS:
+            servico, idempotente = "sheets_escrita", True
+        elif nome in ESCRITAS_NAO_IDEMPOTENTES:
+            servico, idempotente = "sheets_escrita", False
+        else:
+            return atributo
+
+        def chamada(*args, **kwargs):
+            return executar(servico, atributo, *args, idempotente=idempotente, **kwargs)
+        chamada.__name__ = nome
+        return chamada
+
+
+def reiniciar():
+    """Baldes cheios e contadores zerados, como num processo novo (benchmark, testes)"""
+    with _lock:
+        _baldes.clear()
+        _contadores.clear()
@@ -1,11 +1,21 @@
 import os
 import sys
-import base64
-import pandas as pd
-from datetime import datetime, timezone
-from dateutil import parser
+import argparse
+import heapq
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from loguru import logger
-from autom import enviar_email, get_google_services, postar_blog
+import api_google
+import cache_imagens
+from autom import criar_publicador, get_aba, get_google_services, get_planilha, get_secret, postar_blog
+from conteudo import decodificar_conteudo
+from indice import abrir_indice, converter_data_agendada
+from metricas import metricas
+from notificacao import Notificador
+from planilha import PAUSA_CONFIRMACAO, RegistroPublicacoes, id_trabalhador, reserva_expirada, reservar_linhas
 
 
 # === Configuração do logger ===
@@ -13,92 +23,406 @@ logger.remove()  # Remove qualquer configuração padrão
 logger.add(sys.stdout, level="INFO")  # Mostra logs no console (GitHub Actions)
 logger.add("logs_auto_post.log", rotation="1 MB", level="INFO", enqueue=True, backtrace=True, diagnose=True)
 
-def main():
-    logger.info("=== Iniciando auto_post.py ===")
+# Tempo de cada fase da execução, em JSONL (enviado como artefato junto com o log)
+ARQUIVO_METRICAS = os.getenv("ARQUIVO_METRICAS", "metricas_auto_post.jsonl")
 
-    # 1. Conexão com serviços Google
-    try:
-        services = get_google_services()
-        if services is None:
-            raise Exception("Falha ao autenticar com os serviços Google.")
-        logger.success("Conexão com serviços Google bem-sucedida.")
-    except Exception as e:
-        logger.exception(f"Erro na autenticação: {e}")
-        logger.complete()
-        return
 
-    # 2. Ler planilha
+class PoolPublicadores:
+    """Até `paralelos` threads de publicação, cada uma com a sua sessão logada.
+
+    As sessões ficam abertas entre um lote e outro (no modo daemon, entre os
+    posts do dia inteiro) e só são encerradas no `fechar()`.
+    """
+
+    def __init__(self, paralelos=1):
+        self.paralelos = paralelos
+        self._executor = ThreadPoolExecutor(max_workers=paralelos, thread_name_prefix="publicador")
+        self._locais = threading.local()
+        self._publicadores = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+    def fechar(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            publicadores, self._publicadores = self._publicadores, []
+        for publicador in publicadores:
+            publicador.fechar()
+
+    def _publicar(self, post):
+        publicador = getattr(self._locais, "publicador", None)
+        if publicador is None:
+            publicador = self._locais.publicador = criar_publicador()
+            with self._lock:
+                self._publicadores.append(publicador)
+
+        conteudo_html = decodificar_conteudo(post["conteudo_encoded"])
+        return postar_blog(
+            post["categoria"],
+            post["titulo"],
+            post["tags"],
+            conteudo_html,
+            post["imagem_url"],
+            publicador=publicador
+        )
+
+    def _publicar_medindo(self, post):
+        inicio = time.monotonic()
+        try:
+            with metricas.fase("publicacao", titulo=post["titulo"]) as fase:
+                post_id = self._publicar(post)
+                self._medir_memoria(fase)
+                return post_id, time.monotonic() - inicio, None
+        except Exception as e:
+            return None, time.monotonic() - inicio, e
+
+    def _medir_memoria(self, fase):
+        """Pico de RSS do navegador da thread (só o publicador Selenium mede)"""
+        publicador = getattr(self._locais, "publicador", None)
+        medir = getattr(publicador, "medir_memoria", None)
+        if medir is not None:
+            fase["perfil"] = publicador.perfil
+            fase["rss_pico_mb"] = medir()
+
+    def publicar(self, pendentes):
+        """Gera (linha, post, post_id, duracao, erro) à medida que cada post termina,
+        para o loop principal gravar o status e mandar o e-mail na thread principal.
+        """
+        futuros = {self._executor.submit(self._publicar_medindo, post): (linha, post) for linha, post in pendentes}
+        for futuro in as_completed(futuros):
+            linha, post = futuros[futuro]
+            post_id, duracao, erro = futuro.result()
+            yield linha, post, post_id, duracao, erro
+
+
+def get_paralelos():
+    return max(1, int(get_secret("PUBLICADORES_PARALELOS", 1)))
+
+
+# -------------------------------------------------------------------
+# 🔒 Reserva das linhas e divisão entre trabalhadores
+# -------------------------------------------------------------------
+
+# Validade de cada reserva; cobre um lote de POSTS_POR_RESERVA posts por publicador
+RESERVA_SEGUNDOS = int(os.getenv("RESERVA_SEGUNDOS", 900))
+POSTS_POR_RESERVA = 10
+
+# Posts de outra parte atrasados além disso são assumidos (o dono deve ter parado)
+TOLERANCIA_OUTRA_PARTE = timedelta(seconds=int(os.getenv("TOLERANCIA_OUTRA_PARTE", 1800)))
+
+
+def get_parte():
+    """(TRABALHADOR_NUMERO, TRABALHADORES): cada trabalhador fica com as linhas
+    em que linha % TRABALHADORES == TRABALHADOR_NUMERO"""
+    total = max(1, int(os.getenv("TRABALHADORES", 1)))
+    return int(os.getenv("TRABALHADOR_NUMERO", 0)) % total, total
+
+
+def da_minha_parte(pendentes, now):
+    numero, total = get_parte()
+    if total == 1:
+        return pendentes
+    return [
+        (linha, post) for linha, post in pendentes
+        if linha % total == numero or converter_data_agendada(post["data_agendada"]) <= now - TOLERANCIA_OUTRA_PARTE
+    ]
+
+
+def sincronizar_indice(indice):
+    """Atualiza o índice local com a planilha (só data e status)"""
+    with metricas.fase("sincronizar_indice") as fase:
+        fase["linhas"] = indice.sincronizar(get_aba(2))
+    return fase["linhas"]
+
+
+def versao_da_planilha(indice):
+    """modifiedTime da planilha no Drive (uma chamada de metadados), ou None.
+
+    Só funciona a partir da segunda execução, quando o id da planilha já está
+    no índice; sem ele (ou se a chamada falhar) a planilha conta como alterada.
+    """
+    if not indice.planilha_id:
+        return None
+    gc = get_google_services(com_drive=False)["gc"]
     try:
-        gc = services["gc"]
-        SHEET_NAME = os.getenv("SHEET_NAME")
-        sheet = gc.open(SHEET_NAME).get_worksheet(2)
-        dados = sheet.get_all_records()
-        sheet_email = gc.open(SHEET_NAME).get_worksheet(3)
-        remetentes_dados = sheet_email.get_all_records()
-        remetentes_para_envio = []
-        for i, email in enumerate(remetentes_dados):
-            remetentes_para_envio.append(email['email_cadastrado'])
-        df = pd.DataFrame(dados)
-        logger.info(f"Planilha '{SHEET_NAME}' carregada com {len(df)} registros.")
+        with metricas.fase("metadados_planilha"):
+            return api_google.executar("drive", gc.get_file_drive_metadata, indice.planilha_id)["modifiedTime"]
     except Exception as e:
-        logger.exception(f"Erro ao ler planilha: {e}")
-        logger.complete()
-        return
+        logger.warning(f"Não foi possível ler a versão da planilha no Drive: {e}")
+        return None
 
-    # 3. Filtrar posts pendentes e que estejam no horário de agendamento
-    now = datetime.now(timezone.utc)
+
+def atualizar_indice(indice):
+    """Sincroniza o índice só se a planilha mudou desde a última sincronização.
+
+    Devolve as linhas lidas, ou None se o índice já estava em dia.
+    """
+    modificada = versao_da_planilha(indice)
+    if modificada is not None and modificada == indice.planilha_modificada:
+        return None
+    # A versão é lida antes da sincronização: uma edição feita durante ela muda a versão de novo
+    lidas = sincronizar_indice(indice)
+    indice.registrar_versao(get_planilha().id, modificada)
+    return lidas
+
+
+def conferir_vencidos(dados, now):
+    """Confere os posts vencidos com os dados recém-lidos (o índice pode estar defasado)"""
     pendentes = []
 
-    for i, post in enumerate(dados):
+    for linha, post in dados:
         try:
             status = post["status"].strip().lower()
-            if status != "pendente":
+            if status == "publicando":
+                # Reservado por outro trabalhador; só volta se a reserva venceu
+                if not reserva_expirada(post.get("reserva_ate", "")):
+                    continue
+            elif status != "pendente":
                 continue
 
-            data_agendada = parser.isoparse(post["data_agendada"])
-            if data_agendada.tzinfo is None:
-                data_agendada = data_agendada.replace(tzinfo=timezone.utc)
+            data_agendada = converter_data_agendada(post["data_agendada"])
 
-            logger.debug(f"[{i}] {post['titulo']} - Agendado para {data_agendada.isoformat()}")
+            logger.debug(f"[{linha}] {post['titulo']} - Agendado para {data_agendada.isoformat()}")
 
             if data_agendada <= now:
-                pendentes.append((i, post))
+                pendentes.append((linha, post))
         except Exception as e:
-            logger.warning(f"Erro ao verificar linha {i}: {e}")
+            logger.warning(f"Erro ao verificar linha {linha}: {e}")
+
+    return pendentes
+
+
+def ler_remetentes(indice):
+    # Sem mudança na planilha desde a última leitura, vale a lista guardada no índice
+    remetentes_para_envio = indice.remetentes_em_cache()
+    if remetentes_para_envio is not None:
+        return remetentes_para_envio
+
+    sheet_email = get_aba(3)
+    with metricas.fase("leitura_emails"):
+        remetentes_dados = sheet_email.get_all_records()
+    remetentes_para_envio = []
+    for i, email in enumerate(remetentes_dados):
+        remetentes_para_envio.append(email['email_cadastrado'])
+    indice.guardar_remetentes(remetentes_para_envio)
+    return remetentes_para_envio
 
-    if not pendentes:
-        logger.info("Nenhum post pendente ou agendado para agora.")
+
+def publicar_vencidos(indice, pool, linhas, now=None):
+    """Lê as linhas vencidas, publica pelo pool e grava status, índice e e-mails.
+
+    Devolve quantos posts foram publicados.
+    """
+    now = now or datetime.now(timezone.utc)
+    sheet = get_aba(2)
+    try:
+        with metricas.fase("leitura_posts", linhas=len(linhas)):
+            dados = indice.carregar_posts(sheet, linhas)
+        pendentes = da_minha_parte(conferir_vencidos(dados, now), now)
+        if not pendentes:
+            logger.info("Nenhum post pendente ou agendado para agora.")
+            return 0
+        remetentes_para_envio = ler_remetentes(indice)
+    except Exception as e:
+        logger.exception(f"Erro ao ler planilha: {e}")
+        return 0
+
+    # Postar os conteúdos (cada publicador paralelo reaproveita a sua sessão logada)
+    # As linhas são reservadas em lotes antes de publicar, para nenhum outro trabalhador
+    # pegar as mesmas; o status de cada lote vai para a planilha num único batch_update
+    logger.info(f"Postando {len(pendentes)} post(s) com até {pool.paralelos} publicador(es) em paralelo.")
+
+    trabalhador = id_trabalhador()
+    tamanho_lote = pool.paralelos * POSTS_POR_RESERVA
+    pausa = float(os.getenv("RESERVA_PAUSA", PAUSA_CONFIRMACAO))
+
+    inicio_lote = time.monotonic()
+    falhas = []
+    publicadas = []
+    nao_reservadas = 0
+    # Os e-mails saem por uma thread própria, sem segurar a publicação; as imagens
+    # de todos os posts vão para o cache antes do primeiro publicar e ficam lá até o fim
+    with RegistroPublicacoes(sheet) as registro, Notificador(remetentes_para_envio) as notificador, \
+            cache_imagens.pre_carregar([post["imagem_url"] for _, post in pendentes]):
+        for inicio in range(0, len(pendentes), tamanho_lote):
+            lote = pendentes[inicio:inicio + tamanho_lote]
+            try:
+                with metricas.fase("reserva", linhas=len(lote)):
+                    reservadas = set(reservar_linhas(sheet, [linha for linha, _ in lote], trabalhador,
+                                                     RESERVA_SEGUNDOS, pausa))
+            except Exception as e:
+                logger.exception(f"Erro ao reservar linhas: {e}")
+                continue
+            nao_reservadas += len(lote) - len(reservadas)
+
+            for linha, post, post_id, duracao, erro in pool.publicar([p for p in lote if p[0] in reservadas]):
+                if erro is not None:
+                    falhas.append(post['titulo'])
+                    # Devolve a linha para a próxima execução
+                    registro.marcar(linha, "pendente")
+                    logger.opt(exception=erro).error(f"Erro ao postar '{post['titulo']}' ({duracao:.1f}s): {erro}")
+                    continue
+
+                # Atualiza o status para publicado
+                registro.marcar(linha, "publicado", post_id, duracao)
+                publicadas.append(linha)
+                logger.success(f"✅ Post '{post['titulo']}' publicado com sucesso! ({duracao:.1f}s)")
+                notificador.notificar(post['titulo'])
+            registro.gravar()
+
+    indice.marcar(publicadas, "publicado")
+
+    duracao_lote = time.monotonic() - inicio_lote
+    logger.info(
+        f"Resumo: {len(publicadas)}/{len(pendentes)} publicado(s) em {duracao_lote:.1f}s "
+        f"({len(publicadas) / max(duracao_lote, 1e-6) * 60:.2f} posts/min) "
+        f"com {min(pool.paralelos, len(pendentes))} em paralelo."
+    )
+    if nao_reservadas:
+        logger.info(f"{nao_reservadas} post(s) não reservado(s): já estão com outro trabalhador ou a reserva foi abandonada.")
+    if falhas:
+        logger.warning(f"Falharam: {', '.join(falhas)}")
+    if notificador.falhas:
+        logger.warning(f"Emails não enviados: {', '.join(notificador.falhas)}")
+    return len(publicadas)
+
+
+def conectar_google():
+    try:
+        # O Drive só é preciso para publicar: o cliente dele é criado depois, por thread
+        services = get_google_services(com_drive=False)
+        if services is None:
+            raise Exception("Falha ao autenticar com os serviços Google.")
+        logger.success("Conexão com serviços Google bem-sucedida.")
+        return True
+    except Exception as e:
+        logger.exception(f"Erro na autenticação: {e}")
+        return False
+
+
+def main():
+    logger.info("=== Iniciando auto_post.py ===")
+
+    # 1. Conexão com serviços Google
+    if not conectar_google():
         logger.complete()
         return
 
-    # 4. Postar os conteúdos
-    for i, post in pendentes:
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    now = datetime.now(timezone.utc)
+    with abrir_indice() as indice:
+        # 2. Sincronizar o índice local (se a planilha mudou) e achar os posts vencidos
         try:
-            logger.info(f"Postando: {post['titulo']}")
-            conteudo_html = base64.b64decode(post["conteudo_encoded"]).decode("utf-8")
-
-            postar_blog(
-                post["categoria"],
-                post["titulo"],
-                post["tags"],
-                conteudo_html,
-                post["imagem_url"]
-            )
-
-            # Atualiza o status para publicado
-            sheet.update_cell(i + 2, 8, "publicado")
-            logger.success(f"✅ Post '{post['titulo']}' publicado com sucesso!")
-            try:
-                enviar_email(post['titulo'], remetentes_para_envio)
-                logger.success(f"✅ Email enviado com sucesso!")
-            except Exception as e:
-                 logger.exception(f"Erro ao enviar email: {e}")
+            lidas = atualizar_indice(indice)
+            vencidas = indice.vencidos(now)
+            if lidas is None:
+                logger.info(f"Planilha '{os.getenv('SHEET_NAME')}' sem alterações: índice local reaproveitado, {len(vencidas)} vencida(s).")
+            else:
+                logger.info(f"Planilha '{os.getenv('SHEET_NAME')}': {lidas} linha(s) sincronizada(s), {len(vencidas)} vencida(s).")
         except Exception as e:
-            logger.exception(f"Erro ao postar '{post['titulo']}': {e}")
+            logger.exception(f"Erro ao ler planilha: {e}")
+            logger.complete()
+            return
+
+        # 3. Publicar
+        if vencidas:
+            with PoolPublicadores(min(get_paralelos(), len(vencidas))) as pool:
+                publicar_vencidos(indice, pool, vencidas, now)
+        else:
+            # Nada vencido: a execução termina aqui, só com a chamada de metadados se a planilha não mudou
+            proximo = indice.proximo_agendamento(now)
+            if proximo is None:
+                logger.info("Nenhum post pendente ou agendado.")
+            else:
+                logger.info(f"Nenhum post pendente para agora; próximo agendamento em {proximo.isoformat()}.")
 
     logger.info("=== Finalização do script ===")
     logger.complete()  # Garante que os logs sejam gravados antes de encerrar
 
 
+# -------------------------------------------------------------------
+# 🔁 Modo daemon: dorme até o próximo agendamento
+# -------------------------------------------------------------------
+
+def executar_daemon(intervalo_sincronizacao):
+    """Mantém a agenda num heap de datas e publica segundos após cada horário.
+
+    A planilha é relida a cada `intervalo_sincronizacao` segundos (posts novos
+    ou remarcados entram no heap); as sessões do Google e dos publicadores
+    ficam abertas entre um post e outro. SIGTERM/SIGINT encerram ao fim do
+    lote em andamento.
+    """
+    logger.info(f"=== Iniciando auto_post.py em modo daemon (sincronização a cada {intervalo_sincronizacao}s) ===")
+    parar = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: parar.set())
+    signal.signal(signal.SIGINT, lambda *_: parar.set())
+
+    if not conectar_google():
+        logger.complete()
+        return
+
+    agenda = []
+    proxima_sincronizacao = 0.0
+    with abrir_indice() as indice, PoolPublicadores(get_paralelos()) as pool:
+        while not parar.is_set():
+            if time.time() >= proxima_sincronizacao:
+                try:
+                    atualizar_indice(indice)
+                    agenda = [(data.timestamp(), linha) for data, linha in indice.agendados()]
+                    heapq.heapify(agenda)
+                    if agenda:
+                        proximo = datetime.fromtimestamp(agenda[0][0], timezone.utc)
+                        logger.info(f"{len(agenda)} post(s) na agenda; próximo em {proximo.isoformat()}.")
+                except Exception as e:
+                    logger.exception(f"Erro ao sincronizar a planilha: {e}")
+                proxima_sincronizacao = time.time() + intervalo_sincronizacao
+
+            vencidas = []
+            while agenda and agenda[0][0] <= time.time():
+                vencidas.append(heapq.heappop(agenda)[1])
+            if vencidas:
+                publicar_vencidos(indice, pool, vencidas)
+                # Cada lote vira uma "execução" no arquivo de métricas
+                registrar_metricas()
+                metricas.reiniciar()
+                api_google.reiniciar_contadores()
+                continue
+
+            proximo_evento = min(proxima_sincronizacao, agenda[0][0] if agenda else proxima_sincronizacao)
+            parar.wait(max(0.0, proximo_evento - time.time()))
+
+    logger.info("=== Daemon encerrado ===")
+    logger.complete()
+
+
+def registrar_metricas():
+    logger.info(metricas.resumo())
+    logger.info(api_google.resumo())
+    try:
+        metricas.salvar(ARQUIVO_METRICAS, api_google=api_google.contadores())
+    except Exception as e:
+        logger.exception(f"Erro ao salvar métricas: {e}")
+    logger.complete()
+
+
 if __name__ == "__main__":
-    main()
+    argumentos = argparse.ArgumentParser(description="Publica os posts agendados na planilha.")
+    argumentos.add_argument("--daemon", action="store_true",
+                            help="fica rodando e publica cada post no horário, em vez de uma passada só (cron)")
+    argumentos.add_argument("--intervalo-sincronizacao", type=float,
+                            default=float(os.getenv("INTERVALO_SINCRONIZACAO", 300)),
+                            help="segundos entre as releituras da planilha no modo daemon")
+    args = argumentos.parse_args()
+
+    try:
+        if args.daemon:
+            executar_daemon(args.intervalo_sincronizacao)
+        else:
+            main()
+    finally:
+        registrar_metricas()
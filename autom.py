@@ -1,20 +1,17 @@
 from email.mime.text import MIMEText
 import os
+import sys
 import tempfile
 import requests
 import json
-import time
-import gspread
-import streamlit as st
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 import smtplib
+from loguru import logger
+from metricas import metricas
+from api_google import AbaComCota, executar
+import threading
+
+# Streamlit, gspread, googleapiclient e Selenium são importados só quando usados:
+# o auto_post não carrega o Streamlit e, sem posts vencidos, nem o navegador.
 
 
 # -------------------------------------------------------------------
@@ -22,35 +19,54 @@ import smtplib
 # -------------------------------------------------------------------
 
 def get_secret(key: str, default=None):
-    """Tenta obter o segredo do Streamlit ou do ambiente"""
+    """Tenta obter o segredo do Streamlit (se o app estiver rodando) ou do ambiente"""
+    st = _streamlit()
     try:
-        import streamlit as st
-        if key in st.secrets:
-            return st.secrets[key]
-        elif "service_account" in st.secrets and key in st.secrets["service_account"]:
-            return st.secrets["service_account"][key]
+        if st is not None:
+            if key in st.secrets:
+                return st.secrets[key]
+            elif "service_account" in st.secrets and key in st.secrets["service_account"]:
+                return st.secrets["service_account"][key]
     except Exception:
-        pass  # não está rodando dentro do Streamlit
+        pass  # Streamlit sem secrets.toml
 
     return os.getenv(key, default)
 
 
+def _streamlit():
+    """O módulo streamlit se o processo é o app; None no auto_post (sem o custo do import)"""
+    return sys.modules.get("streamlit")
+
+
+def get_url_blog():
+    """Endereço do site do blog (sobrescrevível por BLOG_URL, ex.: ambiente de testes)"""
+    return (get_secret("BLOG_URL") or "https://www.cimatecjr.com.br").rstrip("/")
+
+
 # -------------------------------------------------------------------
 # 🔑 Autenticação Google Sheets
 # -------------------------------------------------------------------
 
-def get_google_services():
-    SCOPE = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-        "https://www.googleapis.com/auth/drive.file"
-    ]
+SCOPE = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/drive.file"
+]
+
+# Registro único por processo: no Streamlit é compartilhado entre as sessões,
+# no auto_post.py vale para a execução inteira.
+_servicos = {}
+_servicos_lock = threading.Lock()
+_drive_por_thread = threading.local()
 
+
+def _carregar_credenciais():
     creds_json = None
 
     # Tenta Streamlit
     try:
-        if "service_account" in st.secrets:
+        st = _streamlit()
+        if st is not None and "service_account" in st.secrets:
             creds_json = st.secrets["service_account"]  # dicionário completo
     except Exception:
         pass
@@ -61,42 +77,195 @@ def get_google_services():
         if raw_env:
             creds_json = json.loads(raw_env)
 
-    if not creds_json:
-        print("❌ Não foi possível encontrar as credenciais do Google.")
+    return creds_json
+
+
+def get_drive():
+    """Cliente do Drive da thread atual.
+
+    O cliente do googleapiclient (httplib2) não é thread-safe, então cada thread
+    tem o seu; o documento de discovery vem da cópia estática da biblioteca,
+    sem ida à rede.
+    """
+    servicos = get_google_services()
+    if servicos is None:
         return None
+    return servicos["drive"]
 
-    try:
-        creds = Credentials.from_service_account_info(creds_json, scopes=SCOPE)
-        gc = gspread.authorize(creds)
-        drive_service = build("drive", "v3", credentials=creds)
-        return {'creds': creds, 'gc': gc, 'drive': drive_service}
-    except Exception as e:
-        print(f"Erro ao autenticar com Google: {e}")
+
+def get_google_services(com_drive=True):
+    """Credenciais, cliente gspread e Drive, criados uma vez e reaproveitados.
+
+    O gspread e o Drive renovam o token das credenciais sozinhos quando ele
+    expira, então o mesmo registro serve para a vida inteira do processo.
+    Com `com_drive=False` o cliente do Drive (e o googleapiclient) fica para depois.
+    """
+    with _servicos_lock:
+        if not _servicos:
+            creds_json = _carregar_credenciais()
+            if not creds_json:
+                print("❌ Não foi possível encontrar as credenciais do Google.")
+                return None
+
+            try:
+                with metricas.fase("google_auth"):
+                    import gspread
+                    from google.oauth2.service_account import Credentials
+                    creds = Credentials.from_service_account_info(creds_json, scopes=SCOPE)
+                    _servicos.update({'creds': creds, 'gc': gspread.authorize(creds)})
+            except Exception as e:
+                print(f"Erro ao autenticar com Google: {e}")
+                return None
+
+        servicos = dict(_servicos)
+
+    if not com_drive:
+        return servicos
+
+    drive_service = servicos.get("drive") or getattr(_drive_por_thread, "drive", None)
+    if drive_service is None:
+        try:
+            with metricas.fase("drive_cliente"):
+                from googleapiclient.discovery import build
+                drive_service = build("drive", "v3", credentials=servicos["creds"],
+                                      static_discovery=True, cache_discovery=False)
+        except Exception as e:
+            print(f"Erro ao autenticar com Google: {e}")
+            return None
+        _drive_por_thread.drive = drive_service
+
+    servicos["drive"] = drive_service
+    return servicos
+
+
+def get_planilha():
+    """Planilha SHEET_NAME, aberta (gc.open) só na primeira chamada"""
+    with _servicos_lock:
+        planilha = _servicos.get("planilha")
+    if planilha is not None:
+        return planilha
+
+    servicos = get_google_services(com_drive=False)
+    if servicos is None:
+        return None
+
+    with metricas.fase("abrir_planilha"):
+        planilha = executar("sheets_leitura", servicos["gc"].open, get_secret("SHEET_NAME"))
+    with _servicos_lock:
+        return _servicos.setdefault("planilha", planilha)
+
+
+def get_aba(indice):
+    """Worksheet pelo índice (com cota e novas tentativas), guardada após o primeiro acesso"""
+    with _servicos_lock:
+        aba = _servicos.get("abas", {}).get(indice)
+    if aba is not None:
+        return aba
+
+    planilha = get_planilha()
+    if planilha is None:
+        return None
+
+    aba = AbaComCota(executar("sheets_leitura", planilha.get_worksheet, indice))
+    with _servicos_lock:
+        return _servicos.setdefault("abas", {}).setdefault(indice, aba)
+
+
+def get_sessao_google():
+    """requests.Session autenticada com a conta de serviço (AuthorizedSession).
+
+    Serve para downloads em streaming direto da API do Drive, sem o
+    googleapiclient; é compartilhada pelas threads.
+    """
+    with _servicos_lock:
+        sessao = _servicos.get("sessao")
+    if sessao is not None:
+        return sessao
+
+    servicos = get_google_services(com_drive=False)
+    if servicos is None or servicos.get("creds") is None:
         return None
 
+    from google.auth.transport.requests import AuthorizedSession
+    with _servicos_lock:
+        return _servicos.setdefault("sessao", AuthorizedSession(servicos["creds"]))
+
+
+def usar_google_services(gc, drive=None, sessao=None):
+    """Troca o registro por clientes já prontos (ex.: os falsos do benchmark).
+
+    Um `drive` (ou `sessao`) passado aqui é compartilhado por todas as threads.
+    """
+    limpar_google_services()
+    with _servicos_lock:
+        _servicos.update({'creds': None, 'gc': gc})
+        if drive is not None:
+            _servicos['drive'] = drive
+        if sessao is not None:
+            _servicos['sessao'] = sessao
+
+
+def limpar_google_services():
+    """Descarta o registro (ex.: credenciais trocadas ou planilha renomeada)"""
+    with _servicos_lock:
+        _servicos.clear()
+    _drive_por_thread.__dict__.clear()
+
 
 # -------------------------------------------------------------------
 # 📸 Função para baixar imagem temporária
 # -------------------------------------------------------------------
 
 def baixar_imagem_para_arquivo(url):
-    r = requests.get(url, stream=True, timeout=30)
-    r.raise_for_status()
-    suffix = os.path.splitext(url.split("?")[0])[1] or ".jpg"
-    fd, caminho = tempfile.mkstemp(suffix=suffix)
-    os.close(fd)
-    with open(caminho, "wb") as f:
-        for chunk in r.iter_content(8192):
-            f.write(chunk)
+    """Baixa a imagem pelo link público num arquivo temporário (quem chama apaga)"""
+    with metricas.fase("download_imagem", origem="link_publico") as fase:
+        with requests.get(url, stream=True, timeout=30) as r:
+            r.raise_for_status()
+            suffix = os.path.splitext(url.split("?")[0])[1] or ".jpg"
+            fd, caminho = tempfile.mkstemp(suffix=suffix)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in r.iter_content(8192):
+                        f.write(chunk)
+            except BaseException:
+                # Download interrompido não deixa temporário para trás
+                os.remove(caminho)
+                raise
+        fase["bytes"] = os.path.getsize(caminho)
     return caminho
 
 
-def enviar_email(titulo, remetentes):
+def abrir_smtp():
+    """Conexão SMTP autenticada (Gmail por padrão; SMTP_HOST/SMTP_PORT/SMTP_SSL para outro servidor)"""
 
     # Credenciais do Gmail
     EMAIL = get_secret("EMAIL_GMAIL")
     SENHA = get_secret("SENHA_GMAIL")
 
+    host = get_secret("SMTP_HOST") or "smtp.gmail.com"
+    porta = int(get_secret("SMTP_PORT") or 465)
+    usar_ssl = str(get_secret("SMTP_SSL") or "1").strip().lower() not in ("0", "false", "nao", "não")
+
+    server = smtplib.SMTP_SSL(host, porta, timeout=30) if usar_ssl else smtplib.SMTP(host, porta, timeout=30)
+    try:
+        if EMAIL and SENHA:
+            server.login(EMAIL, SENHA)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def montar_email(titulos, remetentes):
+    """E-mail avisando a publicação de um post (ou de vários, no resumo da execução)"""
+    if len(titulos) == 1:
+        mensagem = f"O blog '<b>{titulos[0]}</b>' acaba de ser postado com sucesso!"
+        assunto = f"[BLOG POSTADO] {titulos[0]}"
+    else:
+        itens = "".join(f"<li><b>{titulo}</b></li>" for titulo in titulos)
+        mensagem = f"Os blogs abaixo acabam de ser postados com sucesso!<ul>{itens}</ul>"
+        assunto = f"[BLOGS POSTADOS] {len(titulos)} novos posts"
+
     corpo = f"""
     <html>
     <body style="font-family: Arial, sans-serif; background-color:#f4f4f7; padding:20px;">
@@ -112,7 +281,7 @@ def enviar_email(titulo, remetentes):
         
         <!-- Mensagem -->
         <h3 style="font-size:16px; color:#333;">
-            O blog '<b>{titulo}</b>' acaba de ser postado com sucesso!
+            {mensagem}
         </h3>
         
         <h3 style="font-size:16px; color:#333;">
@@ -139,86 +308,64 @@ def enviar_email(titulo, remetentes):
 
     # Criar e-mail
     msg = MIMEText(corpo, "html")
-    msg["Subject"] = f"[BLOG POSTADO] {titulo}"
-    msg["From"] = EMAIL
+    msg["Subject"] = assunto
+    msg["From"] = get_secret("EMAIL_GMAIL")
     msg["To"] = ", ".join(remetentes)
+    return msg
+
 
+def enviar_email(titulo, remetentes):
     # Enviar
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(EMAIL, SENHA)
-        server.send_message(msg)
+    with abrir_smtp() as server:
+        server.send_message(montar_email([titulo], remetentes))
 
 # -------------------------------------------------------------------
 # 🤖 Função principal de postagem
 # -------------------------------------------------------------------
 
-def postar_blog(categoria, titulo, tags, conteudo, img_url):
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--remote-debugging-port=9222")
-
-    service = Service("/usr/bin/chromedriver")
-    driver = webdriver.Chrome(service=service, options=options)
-
-    usuario = get_secret("BLOG_USER")
-    senha = get_secret("BLOG_PASS")
-
-    if not usuario or not senha:
-        print("❌ Credenciais do blog não configuradas.")
-        return
-
-    wait = WebDriverWait(driver, 10)
-
-    # Login
-    driver.get("https://www.cimatecjr.com.br/admin/login")
-    wait.until(EC.presence_of_element_located((By.NAME, "email"))).send_keys(usuario)
-    wait.until(EC.presence_of_element_located((By.NAME, "password"))).send_keys(senha)
-    wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']"))).click()
-
-    # Página de postagem
-    wait.until(EC.url_contains("admin"))
-    driver.get("https://www.cimatecjr.com.br/admin/blog/show")
-
-    wait.until(EC.presence_of_element_located((By.NAME, "category_id"))).send_keys(categoria)
-    wait.until(EC.presence_of_element_located((By.NAME, "title"))).send_keys(titulo)
-    wait.until(EC.presence_of_element_located((By.NAME, "tags"))).send_keys(tags)
-
-    caminho_temp = baixar_imagem_para_arquivo(img_url)
-    wait.until(EC.presence_of_element_located((By.NAME, "file"))).send_keys(caminho_temp)
-
-    elemento = driver.find_element(By.CSS_SELECTOR, "div.note-editable.panel-body[contenteditable='true']")
-    driver.execute_script("arguments[0].innerHTML = arguments[1];", elemento, conteudo)
-    driver.execute_script("""document.querySelector('textarea[name="content"]').value = arguments[0];""", conteudo)
-
-    botao = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "div.pull-right > button.btn-primary[type='submit']")))
-    driver.execute_script("arguments[0].scrollIntoView(true);", botao)
-    time.sleep(1)
-    botao.click()
-
-    
-    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#DataTables_Table_0 tbody tr.odd")))
-    linha = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#DataTables_Table_0 tbody tr:nth-child(1)")))
-    numero = linha.find_element(By.TAG_NAME, "td").text
-    imagem_td = linha.find_elements(By.TAG_NAME, "td")[1]
-    imagem_upload_site = imagem_td.find_element(By.TAG_NAME, "img").get_attribute("src")
-    driver.get("https://www.cimatecjr.com.br/admin/blog/" + numero + "/edit")
-    time.sleep(1)
-    novo_conteudo = f"<img src={imagem_upload_site}> <p><br></p>" + conteudo
-    elemento1 = driver.find_element(By.CSS_SELECTOR, "div.note-editable.panel-body[contenteditable='true']")
-    driver.execute_script("arguments[0].innerHTML = arguments[1];", elemento1, novo_conteudo)
-    driver.execute_script("""document.querySelector('textarea[name="content"]').value = arguments[0];""", novo_conteudo)
-    time.sleep(2)
-    botao1 = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "div.pull-right > button.btn-primary[type='submit']")))
-    driver.execute_script("arguments[0].scrollIntoView(true);", botao1)
-    time.sleep(1)
-    botao1.click()
-
-    # Confirmação
-    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#DataTables_Table_0 tbody tr.odd")))
-    os.remove(caminho_temp)
-    driver.quit()
-
-    print(f"✅ Post '{titulo}' publicado com sucesso!")
+def get_modo_publicacao():
+    """MODO_PUBLICACAO: "duas_etapas" (padrão: cria o post e depois edita o corpo
+    com a imagem enviada ao site) ou "unica" (corpo já com a imagem do Drive, um só salvamento)"""
+    modo = (get_secret("MODO_PUBLICACAO") or "duas_etapas").strip().lower()
+    if modo not in ("duas_etapas", "unica"):
+        raise ValueError(f"MODO_PUBLICACAO inválido: {modo!r}")
+    return modo
+
+
+def url_imagem_no_corpo(img_url):
+    """A URL da imagem se ela abre publicamente como imagem; senão None (volta às duas etapas)"""
+    try:
+        with requests.get(img_url, stream=True, timeout=15) as r:
+            if r.ok and r.headers.get("Content-Type", "").startswith("image/"):
+                return img_url
+    except requests.RequestException:
+        pass
+    logger.warning(f"Imagem {img_url} não é pública; usando o fluxo de duas etapas.")
+    return None
+
+
+def conteudo_com_imagem(url_imagem, conteudo):
+    return f"<img src={url_imagem}> <p><br></p>" + conteudo
+
+
+def criar_publicador():
+    """Cria o publicador escolhido em PUBLICADOR_BACKEND ("selenium" ou "http")"""
+    backend = (get_secret("PUBLICADOR_BACKEND") or "selenium").strip().lower()
+
+    if backend == "http":
+        from publicador_http import PublicadorHTTP
+        return PublicadorHTTP()
+    if backend == "selenium":
+        from publicador_selenium import PublicadorBlog
+        return PublicadorBlog()
+
+    raise ValueError(f"PUBLICADOR_BACKEND inválido: {backend!r}")
+
+
+def postar_blog(categoria, titulo, tags, conteudo, img_url, publicador=None):
+    """Publica um post. Sem `publicador`, abre e fecha uma sessão só para ele."""
+    if publicador is not None:
+        return publicador.publicar(categoria, titulo, tags, conteudo, img_url)
+
+    with criar_publicador() as publicador_unico:
+        return publicador_unico.publicar(categoria, titulo, tags, conteudo, img_url)
@@ -0,0 +1,178 @@
+"""Benchmark do auto_post contra os serviços falsos de servicos_falsos.py.
+
+Exemplos (na raiz do projeto):
+    python -m benchmark.executar
+    python -m benchmark.executar --posts 1 20 200 --backend http --paralelos 1 4
+    python -m benchmark.executar --latencia-admin 0.05 --latencia-planilha 0.2 --json resultado.json
+    python -m benchmark.executar --backend selenium --perfil-chrome padrao enxuto --posts 5
+
+Para cada combinação de cenário, backend, paralelismo (e perfil do Chrome, no
+selenium) roda auto_post.main() inteiro e mede posts/minuto, a latência p50/p95
+de cada publicação e o pico de RSS do navegador.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+import requests
+from loguru import logger
+
+from conteudo import codificar_conteudo
+from benchmark.servicos_falsos import (
+    CABECALHO_POSTS, AbaFalsa, ClienteGspreadFalso, DriveFalso, PlanilhaFalsa,
+    ServidorAdmin, ServidorDrive, ServidorSMTP,
+)
+
+# Imagem pequena o bastante para não dominar o tempo de upload
+IMAGEM = b"\xff\xd8\xff\xe0" + b"\x00" * 20_000 + b"\xff\xd9"
+
+CONTEUDO = "<h2>Post de benchmark</h2>" + "<p>Lorem ipsum dolor sit amet.</p>" * 200
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def montar_planilha(quantidade, drive, historico, latencia):
+    conteudo_encoded = codificar_conteudo(CONTEUDO)
+    linhas = [CABECALHO_POSTS]
+    for n in range(historico):
+        linhas.append(["2020-01-01 09:00:00", f"Antigo {n}", "Tecnologia", "a;b", "", conteudo_encoded,
+                       "2020-01-01 10:00:00", "publicado"])
+    for n in range(quantidade):
+        url = drive.adicionar(f"img{n}", IMAGEM)
+        linhas.append(["2020-01-01 09:00:00", f"Post {n}", "Inovação", "a;b", url, conteudo_encoded,
+                       "2020-01-01 10:00:00", "pendente"])
+
+    posts = AbaFalsa(2, linhas, latencia)
+    emails = AbaFalsa(3, [["email_cadastrado"], ["a@exemplo.com"], ["b@exemplo.com"]], latencia)
+    return PlanilhaFalsa({2: posts, 3: emails})
+
+
+def executar_cenario(quantidade, backend, paralelos, args, perfil="padrao"):
+    import api_google
+    import auto_post
+    from autom import usar_google_services
+    from metricas import metricas
+
+    pasta = tempfile.TemporaryDirectory()
+    admin = ServidorAdmin(args.latencia_admin)
+    drive = ServidorDrive(args.latencia_drive)
+    smtp = ServidorSMTP(args.latencia_smtp)
+    try:
+        planilha = montar_planilha(quantidade, drive, args.historico, args.latencia_planilha)
+        os.environ.update({
+            "BLOG_URL": admin.url,
+            "BLOG_USER": "benchmark@exemplo.com",
+            "BLOG_PASS": "benchmark",
+            "PUBLICADOR_BACKEND": backend,
+            "CHROME_PERFIL": perfil,
+            "PUBLICADORES_PARALELOS": str(paralelos),
+            "SMTP_HOST": "127.0.0.1",
+            "SMTP_PORT": str(smtp.porta),
+            "SMTP_SSL": "0",
+            "EMAIL_GMAIL": "benchmark@exemplo.com",
+            "SENHA_GMAIL": "benchmark",
+            "SHEET_NAME": "benchmark",
+            # A pausa da reserva precisa cobrir uma leitura e uma escrita na planilha
+            "RESERVA_PAUSA": str(3 * args.latencia_planilha + 0.05),
+            # Índice e cache de imagens novos por cenário: cada um começa do zero
+            "ARQUIVO_INDICE": os.path.join(pasta.name, "indice.sqlite3"),
+            "PASTA_CACHE_IMAGENS": os.path.join(pasta.name, "imagens"),
+            "DRIVE_API_URL": f"{drive.url}/drive/v3",
+        })
+        # Sem a sessão autenticada as imagens vêm pelo link público, como antes do cache
+        sessao = None if args.link_publico else requests.Session()
+        usar_google_services(ClienteGspreadFalso(planilha), DriveFalso(drive), sessao)
+        metricas.reiniciar()
+        api_google.reiniciar()
+
+        # Os prints de cada publicação poluiriam a tabela
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            auto_post.main()
+            duracao = time.perf_counter() - inicio
+
+        latencias = [f["duracao"] for f in metricas.fases if f["fase"] == "publicacao" and f["ok"]]
+        rss = [f["rss_pico_mb"] for f in metricas.fases if f.get("rss_pico_mb") is not None]
+        publicados = sum(1 for r in planilha.abas[2].get_all_records() if r["status"] == "publicado")
+        return {
+            "posts": quantidade,
+            "backend": backend,
+            "paralelos": paralelos,
+            "perfil": perfil if backend == "selenium" else "-",
+            "duracao": round(duracao, 3),
+            "publicados": publicados - args.historico,
+            "falhas": quantidade - len(latencias),
+            "posts_por_minuto": round(len(latencias) / duracao * 60, 1) if duracao else 0.0,
+            "p50": round(percentil(latencias, 50), 3),
+            "p95": round(percentil(latencias, 95), 3),
+            # Pico de RSS do navegador (por publicador), só no backend selenium
+            "rss_pico_mb": max(rss) if rss else None,
+            "emails": len(smtp.mensagens),
+            "chamadas_planilha": sum(aba.chamadas for aba in planilha.abas.values()),
+            "fases": metricas.totais(),
+            "api_google": api_google.contadores(),
+        }
+    finally:
+        admin.fechar()
+        drive.fechar()
+        smtp.fechar()
+        pasta.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do auto_post")
+    parser.add_argument("--posts", type=int, nargs="+", default=[1, 20, 200], help="posts vencidos por cenário")
+    parser.add_argument("--backend", nargs="+", default=["http"], choices=["http", "selenium"])
+    parser.add_argument("--paralelos", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--perfil-chrome", nargs="+", default=["padrao"], choices=["padrao", "enxuto"],
+                        help="perfis do Chrome comparados no backend selenium")
+    parser.add_argument("--historico", type=int, default=0, help="posts já publicados na planilha")
+    parser.add_argument("--latencia-admin", type=float, default=0.02, help="segundos por requisição ao admin")
+    parser.add_argument("--latencia-drive", type=float, default=0.02, help="segundos por download de imagem")
+    parser.add_argument("--latencia-planilha", type=float, default=0.1, help="segundos por chamada ao Sheets")
+    parser.add_argument("--latencia-smtp", type=float, default=0.05, help="segundos por e-mail")
+    parser.add_argument("--link-publico", action="store_true",
+                        help="baixa as imagens pelo link público em vez da API do Drive com cache")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args(argv)
+
+    import auto_post  # noqa: F401 -- configura o logger; trocamos pela saída enxuta abaixo
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    resultados = []
+    print(f"{'posts':>6} {'backend':>9} {'perfil':>7} {'paral.':>6} {'tempo(s)':>9} {'posts/min':>10} "
+          f"{'p50(s)':>7} {'p95(s)':>7} {'falhas':>6} {'emails':>6} {'sheets':>6} {'rss(MB)':>8}")
+    cenarios = []
+    for quantidade, backend, paralelos in itertools.product(args.posts, args.backend, args.paralelos):
+        # O perfil do Chrome só muda algo no backend selenium
+        for perfil in (args.perfil_chrome if backend == "selenium" else ["padrao"]):
+            cenarios.append((quantidade, backend, paralelos, perfil))
+
+    for quantidade, backend, paralelos, perfil in cenarios:
+        r = executar_cenario(quantidade, backend, paralelos, args, perfil)
+        resultados.append(r)
+        rss = f"{r['rss_pico_mb']:.0f}" if r["rss_pico_mb"] is not None else "-"
+        print(f"{r['posts']:>6} {r['backend']:>9} {r['perfil']:>7} {r['paralelos']:>6} {r['duracao']:>9.2f} "
+              f"{r['posts_por_minuto']:>10.1f} {r['p50']:>7.3f} {r['p95']:>7.3f} {r['falhas']:>6} "
+              f"{r['emails']:>6} {r['chamadas_planilha']:>6} {rss:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
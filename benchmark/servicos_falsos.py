@@ -0,0 +1,461 @@
+"""Substitutos locais dos serviços usados pelo auto_post (sem rede externa).
+
+- PlanilhaFalsa / AbaFalsa: gspread em memória
+- ServidorDrive: imagens em /uc?id=<id>, com o redirecionamento do Drive público,
+  e em /drive/v3/files/<id> como na API autenticada
+- ServidorAdmin: /admin/login, /admin/blog/show, /admin/blog e /admin/blog/<id>/edit
+- ServidorSMTP: recebe e guarda os e-mails
+
+Todos aceitam uma latência artificial para simular a rede.
+"""
+import hashlib
+import json
+import re
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from gspread.utils import a1_to_rowcol
+
+
+# -------------------------------------------------------------------
+# 📋 Google Sheets em memória
+# -------------------------------------------------------------------
+
+CABECALHO_POSTS = [
+    "data_criacao", "titulo", "categoria", "tags", "imagem_url", "conteudo_encoded",
+    "data_agendada", "status",
+]
+
+
+class AbaFalsa:
+    """Worksheet com a parte da API do gspread que o projeto usa"""
+
+    def __init__(self, id, linhas, latencia=0.0):
+        self.id = id
+        self.linhas = [list(linha) for linha in linhas]
+        self.latencia = latencia
+        self.chamadas = 0
+        self.modificada = time.time()
+        self._lock = threading.Lock()
+
+    def _chamada(self):
+        with self._lock:
+            self.chamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def _escrever(self, linha, coluna, valores):
+        self.modificada = time.time()
+        for deslocamento_linha, valores_linha in enumerate(valores):
+            indice = linha - 1 + deslocamento_linha
+            while len(self.linhas) <= indice:
+                self.linhas.append([])
+            atual = self.linhas[indice]
+            for deslocamento_coluna, valor in enumerate(valores_linha):
+                c = coluna - 1 + deslocamento_coluna
+                while len(atual) <= c:
+                    atual.append("")
+                atual[c] = valor
+
+    def _intervalo(self, intervalo):
+        inicio, _, fim = intervalo.partition(":")
+        linha_inicio, coluna_inicio = a1_to_rowcol(inicio)
+        if not fim:
+            return linha_inicio, coluna_inicio, linha_inicio, coluna_inicio
+        letras, numeros = re.fullmatch(r"([A-Z]*)(\d*)", fim).groups()
+        coluna_fim = a1_to_rowcol(f"{letras}1")[1] if letras else coluna_inicio
+        linha_fim = int(numeros) if numeros else max(len(self.linhas), linha_inicio)
+        return linha_inicio, coluna_inicio, linha_fim, coluna_fim
+
+    def get_all_records(self):
+        self._chamada()
+        with self._lock:
+            cabecalho = self.linhas[0]
+            return [
+                {chave: (linha[c] if c < len(linha) else "") for c, chave in enumerate(cabecalho)}
+                for linha in self.linhas[1:]
+            ]
+
+    def row_values(self, linha):
+        self._chamada()
+        with self._lock:
+            return [str(v) for v in self.linhas[linha - 1]] if linha <= len(self.linhas) else []
+
+    def get_values(self, intervalo):
+        self._chamada()
+        with self._lock:
+            return self._ler(intervalo)
+
+    def batch_get(self, intervalos):
+        self._chamada()
+        with self._lock:
+            return [self._ler(intervalo) for intervalo in intervalos]
+
+    def _ler(self, intervalo):
+        linha_inicio, coluna_inicio, linha_fim, coluna_fim = self._intervalo(intervalo)
+        valores = []
+        for linha in self.linhas[linha_inicio - 1:linha_fim]:
+            valores.append([str(v) for v in linha[coluna_inicio - 1:coluna_fim]])
+        # A API corta as linhas vazias do fim
+        while valores and not any(valores[-1]):
+            valores.pop()
+        return valores
+
+    def update(self, valores, intervalo):
+        self._chamada()
+        with self._lock:
+            linha, coluna = a1_to_rowcol(intervalo.split(":")[0])
+            self._escrever(linha, coluna, valores)
+
+    def update_cell(self, linha, coluna, valor):
+        self._chamada()
+        with self._lock:
+            self._escrever(linha, coluna, [[valor]])
+
+    def batch_update(self, dados, **kwargs):
+        self._chamada()
+        with self._lock:
+            for item in dados:
+                linha, coluna = a1_to_rowcol(item["range"].split(":")[0])
+                self._escrever(linha, coluna, item["values"])
+
+    def append_row(self, valores, **kwargs):
+        self.append_rows([valores])
+
+    def append_rows(self, linhas, **kwargs):
+        self._chamada()
+        with self._lock:
+            self.linhas.extend(list(linha) for linha in linhas)
+            self.modificada = time.time()
+
+
+class PlanilhaFalsa:
+    def __init__(self, abas):
+        self.id = "planilha-falsa"
+        self.abas = abas
+
+    def get_worksheet(self, indice):
+        return self.abas[indice]
+
+
+class ClienteGspreadFalso:
+    def __init__(self, planilha):
+        self.planilha = planilha
+
+    def open(self, nome):
+        return self.planilha
+
+    def get_file_drive_metadata(self, id):
+        """modifiedTime do Drive: muda a cada escrita em qualquer aba"""
+        modificada = max(aba.modificada for aba in self.planilha.abas.values())
+        return {"id": id, "modifiedTime": datetime.fromtimestamp(modificada, timezone.utc).isoformat()}
+
+
+# -------------------------------------------------------------------
+# 🌐 Servidores HTTP locais
+# -------------------------------------------------------------------
+
+class _Servidor:
+    """Sobe um ThreadingHTTPServer numa porta livre, numa thread daemon."""
+
+    def __init__(self, handler):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.estado = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def fechar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def estado(self):
+        return self.server.estado
+
+    def _atrasar(self):
+        if self.estado.latencia:
+            time.sleep(self.estado.latencia)
+
+    def _responder(self, corpo, status=200, tipo="text/html; charset=utf-8", cabecalhos=()):
+        if isinstance(corpo, str):
+            corpo = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in cabecalhos:
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _redirecionar(self, destino, cabecalhos=()):
+        self._responder(b"", 302, cabecalhos=[("Location", destino), *cabecalhos])
+
+    def _corpo(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+class _HandlerDrive(_Handler):
+    def do_GET(self):
+        self._atrasar()
+        url = urlparse(self.path)
+        if url.path == "/uc":
+            file_id = parse_qs(url.query).get("id", [""])[0]
+            return self._redirecionar(f"/download/{file_id}")
+        if url.path.startswith("/download/"):
+            conteudo = self.estado.arquivos.get(url.path.rsplit("/", 1)[1])
+            if conteudo is not None:
+                return self._responder(conteudo, tipo="image/jpeg")
+        if url.path.startswith("/drive/v3/files/"):
+            # API autenticada: metadados (md5) ou o conteúdo com alt=media
+            conteudo = self.estado.arquivos.get(url.path.rsplit("/", 1)[1])
+            if conteudo is not None:
+                if parse_qs(url.query).get("alt") == ["media"]:
+                    return self._responder(conteudo, tipo="image/jpeg")
+                metadados = {"md5Checksum": hashlib.md5(conteudo).hexdigest(), "mimeType": "image/jpeg"}
+                return self._responder(json.dumps(metadados), tipo="application/json")
+        self._responder("não encontrado", 404)
+
+
+class ServidorDrive(_Servidor):
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.arquivos = {}
+        super().__init__(_HandlerDrive)
+
+    def adicionar(self, file_id, conteudo):
+        self.arquivos[file_id] = conteudo
+        return f"{self.url}/uc?id={file_id}"
+
+
+_PAGINA = """<!doctype html><html><head><meta charset="utf-8"></head><body>{}</body></html>"""
+
+_BOTAO_SALVAR = """<div class="pull-right"><button class="btn btn-primary" type="submit">Salvar</button></div>"""
+
+
+class _HandlerAdmin(_Handler):
+    def _logado(self):
+        cookies = self.headers.get("Cookie") or ""
+        return f"sessao={self.estado.sessao}" in cookies
+
+    def do_GET(self):
+        self._atrasar()
+        estado = self.estado
+        caminho = urlparse(self.path).path
+
+        if caminho == "/admin/login":
+            return self._responder(_PAGINA.format(
+                '<form method="post" action="/admin/login">'
+                f'<input type="hidden" name="_token" value="{estado.token}">'
+                '<input name="email"><input type="password" name="password">'
+                '<button type="submit">Entrar</button></form>'
+            ))
+        if not self._logado():
+            return self._redirecionar("/admin/login")
+
+        if caminho == "/admin":
+            return self._responder(_PAGINA.format("<h1>Painel</h1>"))
+
+        if caminho == "/admin/blog/show":
+            opcoes = "".join(f'<option value="{i}">{escape(nome)}</option>'
+                             for i, nome in enumerate(estado.categorias, start=1))
+            return self._responder(_PAGINA.format(
+                '<form method="post" action="/admin/blog" enctype="multipart/form-data">'
+                f'<input type="hidden" name="_token" value="{estado.token}">'
+                f'<select name="category_id">{opcoes}</select>'
+                '<input name="title"><input name="tags"><input type="file" name="file">'
+                '<div class="note-editable panel-body" contenteditable="true"></div>'
+                '<textarea name="content" style="display:none"></textarea>'
+                f'{_BOTAO_SALVAR}</form>'
+            ))
+
+        if caminho == "/admin/blog":
+            with estado.lock:
+                posts = sorted(estado.posts.items(), reverse=True)
+            linhas = "".join(
+                f'<tr class="{"odd" if n % 2 == 0 else "even"}"><td>{numero}</td>'
+                f'<td><img src="/uploads/{numero}.jpg"></td><td>{escape(post["title"])}</td></tr>'
+                for n, (numero, post) in enumerate(posts)
+            )
+            return self._responder(_PAGINA.format(
+                '<table id="DataTables_Table_0"><thead><tr><th>#</th><th>Imagem</th><th>Título</th></tr></thead>'
+                f"<tbody>{linhas}</tbody></table>"
+            ))
+
+        encontrado = re.fullmatch(r"/admin/blog/(\d+)/edit", caminho)
+        if encontrado and int(encontrado.group(1)) in estado.posts:
+            numero = int(encontrado.group(1))
+            post = estado.posts[numero]
+            return self._responder(_PAGINA.format(
+                f'<form method="post" action="/admin/blog/{numero}">'
+                '<input type="hidden" name="_method" value="PUT">'
+                f'<input type="hidden" name="_token" value="{estado.token}">'
+                f'<input name="title" value="{escape(post["title"])}">'
+                f'<div class="note-editable panel-body" contenteditable="true">{post["content"]}</div>'
+                f'<textarea name="content" style="display:none">{escape(post["content"])}</textarea>'
+                f'{_BOTAO_SALVAR}</form>'
+            ))
+
+        self._responder("não encontrado", 404)
+
+    def do_POST(self):
+        self._atrasar()
+        estado = self.estado
+        caminho = urlparse(self.path).path
+        corpo = self._corpo()
+
+        if caminho == "/admin/login":
+            campos = {k: v[0] for k, v in parse_qs(corpo.decode()).items()}
+            if campos.get("_token") != estado.token or not campos.get("email"):
+                return self._redirecionar("/admin/login")
+            with estado.lock:
+                estado.logins += 1
+            return self._redirecionar("/admin", [("Set-Cookie", f"sessao={estado.sessao}; Path=/")])
+        if not self._logado():
+            return self._redirecionar("/admin/login")
+
+        if caminho == "/admin/blog":
+            campos, arquivos = self._multipart(corpo)
+            if campos.get("_token") != estado.token or "file" not in arquivos:
+                return self._responder("formulário inválido", 422)
+            with estado.lock:
+                estado.ultimo_numero += 1
+                estado.posts[estado.ultimo_numero] = {
+                    "title": campos.get("title", ""),
+                    "category_id": campos.get("category_id", ""),
+                    "tags": campos.get("tags", ""),
+                    "content": campos.get("content", ""),
+                    "token": campos["_token"],
+                    "imagem_bytes": len(arquivos["file"]),
+                }
+            return self._redirecionar("/admin/blog")
+
+        encontrado = re.fullmatch(r"/admin/blog/(\d+)", caminho)
+        if encontrado and int(encontrado.group(1)) in estado.posts:
+            campos = {k: v[0] for k, v in parse_qs(corpo.decode(), keep_blank_values=True).items()}
+            with estado.lock:
+                estado.posts[int(encontrado.group(1))]["content"] = campos.get("content", "")
+                estado.edicoes += 1
+            return self._redirecionar("/admin/blog")
+
+        self._responder("não encontrado", 404)
+
+    def _multipart(self, corpo):
+        cabecalho = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+        mensagem = BytesParser(policy=HTTP).parsebytes(cabecalho + corpo)
+        campos, arquivos = {}, {}
+        for parte in mensagem.iter_parts():
+            nome = parte.get_param("name", header="content-disposition")
+            if parte.get_filename() is not None:
+                arquivos[nome] = parte.get_payload(decode=True)
+            else:
+                campos[nome] = parte.get_payload(decode=True).decode("utf-8")
+        return campos, arquivos
+
+
+class ServidorAdmin(_Servidor):
+    CATEGORIAS = [
+        "Tecnologia", "Inovação", "Gestão e Negócios", "Construção Cívil e Segurança",
+        "Sustentabilidade", "Química e Alimentos",
+    ]
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.categorias = self.CATEGORIAS
+        self.token = "token-csrf-falso"
+        self.sessao = "sessao-falsa"
+        self.posts = {}
+        self.ultimo_numero = 0
+        self.edicoes = 0
+        self.logins = 0
+        self.lock = threading.Lock()
+        super().__init__(_HandlerAdmin)
+
+
+# -------------------------------------------------------------------
+# 📬 SMTP local
+# -------------------------------------------------------------------
+
+class _HandlerSMTP(socketserver.StreamRequestHandler):
+    def _enviar(self, linha):
+        self.wfile.write((linha + "\r\n").encode())
+
+    def handle(self):
+        estado = self.server.estado
+        self._enviar("220 smtp-falso")
+        while True:
+            linha = self.rfile.readline().decode(errors="replace").strip()
+            if not linha:
+                return
+            comando = linha.split()[0].upper()
+            if comando in ("EHLO", "HELO"):
+                self._enviar("250-smtp-falso")
+                self._enviar("250 AUTH PLAIN LOGIN")
+            elif comando == "AUTH":
+                self._enviar("235 autenticado")
+            elif comando == "DATA":
+                self._enviar("354 pode enviar")
+                partes = []
+                while True:
+                    parte = self.rfile.readline()
+                    if parte in (b".\r\n", b""):
+                        break
+                    partes.append(parte)
+                if estado.latencia:
+                    time.sleep(estado.latencia)
+                with estado.lock:
+                    estado.mensagens.append(b"".join(partes))
+                self._enviar("250 recebido")
+            elif comando == "QUIT":
+                self._enviar("221 tchau")
+                return
+            else:
+                self._enviar("250 ok")
+
+
+class ServidorSMTP:
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.mensagens = []
+        self.lock = threading.Lock()
+        self.servidor = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _HandlerSMTP)
+        self.servidor.daemon_threads = True
+        self.servidor.estado = self
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def porta(self):
+        return self.servidor.server_address[1]
+
+    def fechar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+# -------------------------------------------------------------------
+# ☁️ Drive
+# -------------------------------------------------------------------
+
+class DriveFalso:
+    """Cliente do Drive para o registro do autom; os arquivos vêm do ServidorDrive"""
+
+    def __init__(self, servidor):
+        self.servidor = servidor
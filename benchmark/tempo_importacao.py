@@ -0,0 +1,57 @@
+"""Tempo de importação do auto_post (partida a frio do worker).
+
+Exemplo (na raiz do projeto):
+    python -m benchmark.tempo_importacao
+    python -m benchmark.tempo_importacao --modulos auto_post autom --repeticoes 10
+
+Cada medida roda num processo novo com `python -X importtime` e soma o tempo
+acumulado dos módulos de topo. Também confere que o worker não carrega os
+pacotes que só o app Streamlit ou a publicação usam.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Nada disso deve ser importado só para decidir se há posts vencidos
+PESADOS = ("streamlit", "selenium", "pandas", "googleapiclient", "gspread", "google", "PIL")
+
+
+def medir(modulo):
+    """(tempo em ms, módulos pesados carregados) de um `import modulo` num processo novo"""
+    codigo = (
+        f"import sys, {modulo}\n"
+        f"print(','.join(sorted({{m.split('.')[0] for m in sys.modules}} & set({PESADOS!r}))))"
+    )
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True, text=True, check=True,
+    )
+    total = 0
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        # Só os módulos de topo (sem recuo) somam; os aninhados já estão no acumulado deles
+        if acumulado.strip().isdigit() and not nome[1:].startswith(" "):
+            total += int(acumulado)
+    carregados = [m for m in resultado.stdout.strip().splitlines()[-1].split(",") if m] if resultado.stdout.strip() else []
+    return total / 1000, carregados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de importação do worker")
+    parser.add_argument("--modulos", nargs="+", default=["auto_post"])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'módulo':>12} {'mediana(ms)':>12} {'mín(ms)':>9}  pesados carregados")
+    for modulo in args.modulos:
+        medidas = [medir(modulo) for _ in range(args.repeticoes)]
+        tempos = [tempo for tempo, _ in medidas]
+        pesados = medidas[-1][1]
+        print(f"{modulo:>12} {statistics.median(tempos):>12.1f} {min(tempos):>9.1f}  {', '.join(pesados) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
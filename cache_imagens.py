@@ -0,0 +1,236 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+from loguru import logger
+
+from api_google import executar
+from autom import baixar_imagem_para_arquivo, get_secret, get_sessao_google
+from metricas import metricas
+
+
+# -------------------------------------------------------------------
+# 🗃️ Cache local das imagens de destaque (Drive)
+# -------------------------------------------------------------------
+#
+# As imagens do Drive são lidas pela API autenticada (files/<id>?alt=media),
+# em streaming, e guardadas como <file_id>-<md5>.<ext>: a mesma imagem não é
+# baixada de novo em novas tentativas nem no "Postar agora", e uma imagem
+# trocada no Drive (md5 novo) vira outra entrada. O cache é LRU e limitado
+# a CACHE_IMAGENS_MB; quem não é do Drive continua no download público.
+
+API_DRIVE = "https://www.googleapis.com/drive/v3"
+
+EXTENSOES = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+PARCIAL = ".parcial"
+
+
+def id_do_drive(url):
+    """file id de uma URL do Drive (uc?id=... ou /file/d/<id>/), ou None"""
+    endereco = urlparse(str(url))
+    if endereco.path.rstrip("/").endswith("/uc"):
+        return parse_qs(endereco.query).get("id", [None])[0]
+    achado = re.search(r"/file/d/([^/]+)", endereco.path)
+    return achado.group(1) if achado else None
+
+
+def _ler_metadados(sessao, url):
+    resposta = sessao.get(url, params={"fields": "md5Checksum,mimeType", "supportsAllDrives": "true"}, timeout=30)
+    resposta.raise_for_status()
+    return resposta.json()
+
+
+def _baixar_conteudo(sessao, url, caminho):
+    """Grava o arquivo em `caminho` (do zero a cada tentativa) e devolve o md5 do que veio"""
+    soma = hashlib.md5()
+    with open(caminho, "wb") as arquivo, sessao.get(
+        url, params={"alt": "media", "supportsAllDrives": "true"}, stream=True, timeout=30,
+    ) as resposta:
+        resposta.raise_for_status()
+        for bloco in resposta.iter_content(64 * 1024):
+            arquivo.write(bloco)
+            soma.update(bloco)
+    return soma.hexdigest()
+
+
+class CacheImagens:
+    """Pasta de imagens endereçadas por (file id, md5), com limite de tamanho e descarte LRU"""
+
+    def __init__(self, pasta, limite_bytes):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._locks_por_arquivo = {}
+        self._em_uso = {}
+        self.acertos = 0
+        self.downloads = 0
+
+    def _lock_do_arquivo(self, nome):
+        with self._lock:
+            return self._locks_por_arquivo.setdefault(nome, threading.Lock())
+
+    def obter(self, file_id, sessao):
+        """Caminho da imagem no cache, baixando pela API do Drive se ainda não estiver lá.
+
+        O arquivo já volta marcado como em uso (fora do descarte): quem chama
+        devolve com `liberar()` quando terminar.
+        """
+        api = (get_secret("DRIVE_API_URL") or API_DRIVE).rstrip("/")
+        metadados = executar("drive", _ler_metadados, sessao, f"{api}/files/{file_id}")
+        md5 = metadados.get("md5Checksum")
+        nome = f"{file_id}-{md5 or 'sem-md5'}{EXTENSOES.get(metadados.get('mimeType'), '.jpg')}"
+        destino = os.path.join(self.pasta, nome)
+
+        # Duas threads pedindo a mesma imagem: a segunda espera o download da primeira.
+        # A marca de uso vem antes de olhar o arquivo: o descarte confere a marca
+        # com o mesmo lock, então ou ele já apagou (e baixamos de novo) ou não apaga mais
+        with self._lock_do_arquivo(nome):
+            self._marcar_uso(nome, +1)
+            try:
+                baixou = not (md5 and os.path.exists(destino))
+                if baixou:
+                    self._baixar(api, file_id, md5, destino, sessao)
+                else:
+                    os.utime(destino)  # mais recente no LRU
+                    with self._lock:
+                        self.acertos += 1
+            except BaseException:
+                self.liberar(destino)
+                raise
+        if baixou:
+            self._aparar()
+        return destino
+
+    def liberar(self, caminho):
+        """Devolve um arquivo recebido do `obter()`; sem uso, ele volta a poder ser descartado"""
+        self._marcar_uso(os.path.basename(caminho), -1)
+
+    def _marcar_uso(self, nome, delta):
+        with self._lock:
+            usos = self._em_uso.get(nome, 0) + delta
+            if usos > 0:
+                self._em_uso[nome] = usos
+            else:
+                self._em_uso.pop(nome, None)
+
+    def _baixar(self, api, file_id, md5, destino, sessao):
+        with metricas.fase("download_imagem", origem="drive_api") as fase:
+            fd, parcial = tempfile.mkstemp(suffix=PARCIAL, dir=self.pasta)
+            os.close(fd)
+            try:
+                baixado = executar("drive", _baixar_conteudo, sessao, f"{api}/files/{file_id}", parcial)
+                if md5 and baixado != md5:
+                    raise ValueError(f"md5 da imagem {file_id} não confere com o do Drive")
+                os.replace(parcial, destino)
+            except BaseException:
+                os.remove(parcial)
+                raise
+            fase["bytes"] = os.path.getsize(destino)
+        with self._lock:
+            self.downloads += 1
+
+    def _aparar(self):
+        """Apaga as imagens usadas há mais tempo até caber no limite (as em uso ficam)"""
+        entradas = []
+        for entrada in os.scandir(self.pasta):
+            if entrada.is_file() and not entrada.name.endswith(PARCIAL):
+                estado = entrada.stat()
+                entradas.append((estado.st_mtime, estado.st_size, entrada.name))
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, nome in sorted(entradas):
+            if total <= self.limite_bytes:
+                break
+            with self._lock:
+                if nome in self._em_uso:
+                    continue
+                try:
+                    os.remove(os.path.join(self.pasta, nome))
+                    total -= tamanho
+                except FileNotFoundError:
+                    pass
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache():
+    """Cache da pasta PASTA_CACHE_IMAGENS (padrão .cache_imagens), até CACHE_IMAGENS_MB (padrão 256)"""
+    pasta = get_secret("PASTA_CACHE_IMAGENS") or ".cache_imagens"
+    with _caches_lock:
+        if pasta not in _caches:
+            limite = int(get_secret("CACHE_IMAGENS_MB") or 256) * 1024 * 1024
+            _caches[pasta] = CacheImagens(pasta, limite)
+        return _caches[pasta]
+
+
+def _do_cache(url):
+    """(cache, caminho) da imagem já marcada como em uso, ou None (não é do Drive,
+    sem credenciais, API falhou). O caminho é devolvido com cache.liberar()."""
+    file_id = id_do_drive(url)
+    sessao = get_sessao_google() if file_id else None
+    if sessao is None:
+        return None
+    cache = get_cache()
+    try:
+        return cache, cache.obter(file_id, sessao)
+    except Exception as e:
+        logger.warning(f"Imagem {file_id} não veio pela API do Drive ({e}); usando o link público.")
+        return None
+
+
+@contextmanager
+def imagem_local(url):
+    """Arquivo local da imagem durante o bloco.
+
+    Do cache (protegida do descarte até o fim do bloco) quando possível; senão
+    um temporário baixado pelo link público, removido na saída com ou sem erro.
+    """
+    do_cache = _do_cache(url)
+    if do_cache is not None:
+        cache, caminho = do_cache
+        try:
+            yield caminho
+        finally:
+            cache.liberar(caminho)
+        return
+
+    caminho = baixar_imagem_para_arquivo(url)
+    try:
+        yield caminho
+    finally:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def pre_carregar(urls, paralelos=4):
+    """Baixa para o cache, em paralelo, as imagens do Drive dos posts que vão sair,
+    e as mantém fora do descarte até o fim do bloco (a publicação do lote).
+
+    Devolve quantas ficaram no cache. Falhas não interrompem nada: o publicador
+    tenta de novo (ou usa o link público).
+    """
+    guardadas = []
+    try:
+        urls = [url for url in dict.fromkeys(urls) if id_do_drive(url)]
+        if urls and get_sessao_google() is not None:
+            with metricas.fase("pre_carregar_imagens", imagens=len(urls)):
+                with ThreadPoolExecutor(max_workers=paralelos, thread_name_prefix="imagens") as executor:
+                    guardadas = [do_cache for do_cache in executor.map(_do_cache, urls) if do_cache]
+    except Exception as e:
+        logger.warning(f"Erro ao pré-carregar as imagens: {e}")
+    try:
+        yield len(guardadas)
+    finally:
+        for cache, caminho in guardadas:
+            cache.liberar(caminho)
@@ -0,0 +1,78 @@
+import base64
+import hashlib
+import io
+import zlib
+
+from api_google import executar
+
+
+# -------------------------------------------------------------------
+# 🗜️ Formato de armazenamento do conteúdo dos posts (conteudo_encoded)
+# -------------------------------------------------------------------
+#
+#   <base64>              v1: UTF-8 em base64 puro (linhas antigas)
+#   v2:z:<base64>         v2: zlib + base64 na própria célula
+#   v2:drive:<file_id>    v2: zlib num arquivo do Drive (posts que não cabem na célula)
+#
+# O ":" não existe no alfabeto base64, então o prefixo nunca colide com o v1.
+
+PREFIXO_V2 = "v2:"
+
+# O Sheets aceita até 50.000 caracteres por célula; a folga cobre edições manuais
+LIMITE_CELULA = 45_000
+
+
+def codificar_conteudo(texto, drive_service=None, pasta_id=None):
+    """Comprime o conteúdo para a planilha; o que não couber na célula vai para o Drive."""
+    comprimido = zlib.compress(texto.encode("utf-8"), 9)
+    valor = PREFIXO_V2 + "z:" + base64.b64encode(comprimido).decode("ascii")
+    if len(valor) <= LIMITE_CELULA:
+        return valor
+
+    if drive_service is None or not pasta_id:
+        raise ValueError("Conteúdo grande demais para a célula da planilha e sem pasta do Drive para guardá-lo.")
+
+    from googleapiclient.http import MediaIoBaseUpload
+
+    nome = f"conteudo-{hashlib.sha256(comprimido).hexdigest()[:16]}.html.zlib"
+    media = MediaIoBaseUpload(io.BytesIO(comprimido), mimetype="application/octet-stream", resumable=True)
+    requisicao = drive_service.files().create(
+        body={"name": nome, "parents": [pasta_id]},
+        media_body=media,
+        fields="id",
+        supportsAllDrives=True
+    )
+    criado = None
+    while criado is None:
+        _, criado = executar("drive", requisicao.next_chunk)
+    return PREFIXO_V2 + "drive:" + criado["id"]
+
+
+def decodificar_conteudo(valor, drive_service=None):
+    """Devolve o HTML de qualquer versão do formato (v1 em base64 puro ou v2)."""
+    valor = str(valor).strip()
+    if not valor.startswith(PREFIXO_V2):
+        return base64.b64decode(valor).decode("utf-8")
+
+    tipo, _, dado = valor[len(PREFIXO_V2):].partition(":")
+    if tipo == "z":
+        return zlib.decompress(base64.b64decode(dado)).decode("utf-8")
+    if tipo == "drive":
+        if drive_service is None:
+            from autom import get_drive
+            drive_service = get_drive()
+        return zlib.decompress(_baixar_do_drive(drive_service, dado)).decode("utf-8")
+
+    raise ValueError(f"Formato de conteúdo desconhecido: {valor[:20]!r}")
+
+
+def _baixar_do_drive(drive_service, file_id):
+    from googleapiclient.http import MediaIoBaseDownload
+
+    buffer = io.BytesIO()
+    requisicao = drive_service.files().get_media(fileId=file_id, supportsAllDrives=True)
+    download = MediaIoBaseDownload(buffer, requisicao, chunksize=1024 * 1024)
+    concluido = False
+    while not concluido:
+        _, concluido = executar("drive", download.next_chunk)
+    return buffer.getvalue()
@@ -1,7 +1,132 @@
 import pandas as pd
 import streamlit as st
-import base64
-from autom import get_google_services, postar_blog  # função Selenium separada
+import threading
+import time
+from uuid import uuid4
+from autom import criar_publicador, get_aba, get_google_services, postar_blog
+import conteudo
+from planilha import RegistroPublicacoes, id_trabalhador, linha_da_planilha, reservar_linhas
+
+# Validade da reserva de "Postar agora" (um post só)
+RESERVA_POSTAR_AGORA = 300
+
+# Sem publicar por esse tempo, a sessão (e o Chrome, no backend selenium) é fechada
+PUBLICADOR_OCIOSO = 600
+
+
+class PublicadorCompartilhado:
+    """Uma sessão de publicação para o app inteiro, usada por um clique de cada vez.
+
+    Todas as sessões do Streamlit dividem o mesmo publicador (um Chrome só no
+    host, em vez de um por visitante), que é fechado depois de
+    PUBLICADOR_OCIOSO segundos sem uso e reaberto no próximo clique.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._publicador = None
+        self._timer = None
+
+    def postar(self, categoria, titulo, tags, conteudo, img_url):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._publicador is None:
+                self._publicador = criar_publicador()
+            try:
+                return postar_blog(categoria, titulo, tags, conteudo, img_url, publicador=self._publicador)
+            finally:
+                self._timer = threading.Timer(PUBLICADOR_OCIOSO, self.fechar)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def fechar(self):
+        with self._lock:
+            publicador, self._publicador = self._publicador, None
+        if publicador is not None:
+            publicador.fechar()
+
+
+@st.cache_resource(show_spinner=False)
+def get_publicador():
+    """Publicador compartilhado entre as sessões do app (ver PublicadorCompartilhado)"""
+    return PublicadorCompartilhado()
+
+
+# Instantâneo da aba de agendamentos: evita baixar a planilha inteira a cada clique.
+# "Postar agora" e o cadastro de um post novo invalidam o cache na hora.
+TTL_AGENDAMENTOS = 120
+
+
+@st.cache_data(ttl=TTL_AGENDAMENTOS, show_spinner="Carregando agendamentos...")
+def carregar_agendamentos():
+    return get_aba(2).get_all_records()
+
+
+def invalidar_agendamentos():
+    carregar_agendamentos.clear()
+    quadro_historico.clear()
+
+
+# Colunas do histórico: o conteúdo (base64/comprimido) e os dados da reserva não vão para o navegador
+COLUNAS_HISTORICO = ["linha", "titulo", "categoria", "tags", "data_agendada", "status",
+                     "publicado_em", "post_id", "duracao_publicacao", "data_criacao"]
+
+TAMANHOS_PAGINA = [10, 25, 50, 100]
+
+
+@st.cache_data(ttl=TTL_AGENDAMENTOS, show_spinner=False)
+def quadro_historico():
+    """Histórico já projetado, com data_agendada como datetime (UTC) para os filtros"""
+    quadro = pd.DataFrame(carregar_agendamentos())
+    if quadro.empty:
+        return pd.DataFrame(columns=COLUNAS_HISTORICO)
+    quadro.insert(0, "linha", [linha_da_planilha(i) for i in range(len(quadro))])
+    quadro = quadro[[coluna for coluna in COLUNAS_HISTORICO if coluna in quadro.columns]]
+    # Sem fuso é UTC, como no auto_post
+    quadro["data_agendada"] = pd.to_datetime(quadro["data_agendada"], errors="coerce", format="mixed", utc=True)
+    return quadro
+
+
+def paginar(quantidade, chave):
+    """Controles de página; devolve o intervalo (início, fim) a exibir"""
+    col_tamanho, col_pagina, col_info = st.columns([1, 1, 2])
+    tamanho = col_tamanho.selectbox("Por página", TAMANHOS_PAGINA, key=f"{chave}_tamanho")
+    paginas = max(1, -(-quantidade // tamanho))
+    pagina = col_pagina.number_input("Página", min_value=1, max_value=paginas, value=1, step=1, key=f"{chave}_pagina")
+    inicio = (pagina - 1) * tamanho
+    fim = min(inicio + tamanho, quantidade)
+    col_info.caption(f"{inicio + 1 if quantidade else 0}–{fim} de {quantidade}")
+    return inicio, fim
+
+
+def exibir_historico():
+    quadro = quadro_historico()
+
+    col_status, col_categoria, col_datas = st.columns(3)
+    status = col_status.multiselect("Status", sorted(quadro["status"].dropna().unique()))
+    categorias = col_categoria.multiselect("Categoria", sorted(quadro["categoria"].dropna().unique()))
+    datas = col_datas.date_input("Agendado entre", value=(), format="DD/MM/YYYY")
+
+    filtro = pd.Series(True, index=quadro.index)
+    if status:
+        filtro &= quadro["status"].isin(status)
+    if categorias:
+        filtro &= quadro["categoria"].isin(categorias)
+    if len(datas) == 2:
+        dias = quadro["data_agendada"].dt.date
+        filtro &= (dias >= datas[0]) & (dias <= datas[1])
+    filtrado = quadro[filtro]
+
+    inicio, fim = paginar(len(filtrado), "historico")
+    st.dataframe(filtrado.iloc[inicio:fim], hide_index=True)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def decodificar_conteudo(conteudo_encoded):
+    # Aceita o base64 antigo e o formato comprimido (na célula ou no Drive)
+    return conteudo.decodificar_conteudo(conteudo_encoded)
+
 
 def exibir_page():
 
@@ -16,52 +141,66 @@ def exibir_page():
         st.stop()
 
     # 2. Desempacotamento seguro
-    gc = services["gc"]
-    SHEET_NAME = st.secrets["SHEET_NAME"]
-    sheet = gc.open(SHEET_NAME).get_worksheet(2)
-    dados = sheet.get_all_records()
-    df = pd.DataFrame(dados)
+    sheet = get_aba(2)
+    dados = carregar_agendamentos()
 
     if st.toggle("Ver histórico de posts agendados com a automação", False):
         with st.container(border=True):
             st.subheader("Histórico de posts agendados com a automação")
-            st.dataframe(df)
-
-    posts_pendentes = False
-    
-    for i, post in enumerate(dados):
-       
-        if post["status"] == "pendente":
-            posts_pendentes = True
-            conteudo_html = base64.b64decode(post["conteudo_encoded"]).decode("utf-8")
-            with st.container(border=True):
-                st.subheader(post["titulo"])
-                st.markdown(f"**Categoria:** {post['categoria']} | **Agendado para:** {post['data_agendada']}")
-
-
-                with st.expander("👁️ Visualizar conteúdo"):
-                    
+            exibir_historico()
+
+    # Só a página atual dos pendentes é desenhada (o índice i vira a linha da planilha)
+    pendentes = [(i, post) for i, post in enumerate(dados) if post["status"] == "pendente"]
+    posts_pendentes = bool(pendentes)
+    if pendentes:
+        inicio, fim = paginar(len(pendentes), "pendentes")
+        pendentes = pendentes[inicio:fim]
+
+    for i, post in pendentes:
+        with st.container(border=True):
+            st.subheader(post["titulo"])
+            st.markdown(f"**Categoria:** {post['categoria']} | **Agendado para:** {post['data_agendada']}")
+
+            # O conteúdo só é decodificado quando o usuário pede para ver
+            if st.toggle("👁️ Visualizar conteúdo", key=f"ver_{i}"):
+                with st.container(border=True):
+                
                     st.write(post["imagem_url"])
-                    
-                    st.markdown(conteudo_html, unsafe_allow_html=True)
+                
+                    st.markdown(decodificar_conteudo(post["conteudo_encoded"]), unsafe_allow_html=True)
 
                     st.divider()
                     st.markdown("**Tags:** " + post["tags"])
 
                     if st.button(f"📤 Postar agora", key=f"postar_{i}"):
+                        linha = linha_da_planilha(i)
+                        # Reserva a linha para o auto_post (ou outra aba) não publicar junto; o id
+                        # é único por clique porque todas as sessões do app dividem o mesmo host:pid
+                        reserva = f"{id_trabalhador()}:{uuid4().hex}"
+                        if not reservar_linhas(sheet, [linha], reserva, RESERVA_POSTAR_AGORA):
+                            invalidar_agendamentos()
+                            st.warning("Não foi possível reservar este post: outro processo já está publicando "
+                                       "ou a planilha demorou a responder. Tente de novo em alguns minutos.")
+                            st.stop()
+
                         st.info(f"Postando '{post['titulo']}'...")
-                        try:
-                            postar_blog(
-                                post["categoria"],
-                                post["titulo"],
-                                post["tags"],
-                                conteudo_html,
-                                post["imagem_url"]
-                            )
-                            sheet.update_cell(i+2, 8, "publicado")
-                            st.success("✅ Publicado com sucesso!")
-                        except Exception as e:
-                            st.error(f"Erro ao postar: {e}")
+                        with RegistroPublicacoes(sheet) as registro:
+                            try:
+                                inicio = time.monotonic()
+                                post_id = get_publicador().postar(
+                                    post["categoria"],
+                                    post["titulo"],
+                                    post["tags"],
+                                    decodificar_conteudo(post["conteudo_encoded"]),
+                                    post["imagem_url"],
+                                )
+                                registro.marcar(linha, "publicado", post_id, time.monotonic() - inicio)
+                                st.success("✅ Publicado com sucesso!")
+                            except Exception as e:
+                                # Libera a reserva para a próxima tentativa
+                                registro.marcar(linha, "pendente")
+                                st.error(f"Erro ao postar: {e}")
+                        invalidar_agendamentos()
     if not posts_pendentes:
         with st.container(border=True):
             st.subheader("Post agendados pendentes")
@@ -1,22 +1,165 @@
 import streamlit as st
 import datetime
-import base64
-import io
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+from html.parser import HTMLParser
+
+import importacao
+import midia
 
 # Supondo que 'autom' seja seu arquivo de biblioteca com a função get_google_services
-from autom import get_google_services 
+from autom import get_aba, get_google_services
+from conteudo import codificar_conteudo
+from exibir import invalidar_agendamentos
+from planilha import CATEGORIAS, garantir_cabecalho, montar_linha
+
+# -------------------------------------------------------------------
+# 👁️ Pré-visualização: o HTML exatamente como vai para o editor do blog
+# -------------------------------------------------------------------
+
+# Posts maiores que isso são renderizados em seções, quebradas entre elementos de primeiro nível
+TAMANHO_SECAO = 20_000
+
+# O publicador põe o conteúdo cru como innerHTML do Summernote: a prévia faz igual
+MOLDURA_PREVIA = '<div class="note-editable" style="font-family: sans-serif; line-height: 1.5;">{}</div>'
+
+# Elementos sem tag de fechamento
+ELEMENTOS_VAZIOS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _InicioDosElementos(HTMLParser):
+    """Posições (linha, coluna) em que começa cada elemento de primeiro nível"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.abertos = []
+        self.posicoes = []
+
+    def handle_starttag(self, tag, attrs):
+        if not self.abertos:
+            self.posicoes.append(self.getpos())
+        if tag not in ELEMENTOS_VAZIOS:
+            self.abertos.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.abertos:
+            self.posicoes.append(self.getpos())
+
+    def handle_endtag(self, tag):
+        # Fechamento sem abertura é ignorado; o que ficou aberto dentro dele fecha junto
+        if tag in self.abertos:
+            while self.abertos.pop() != tag:
+                pass
+
+
+def _fronteiras(conteudo):
+    """Índices do texto onde dá para cortar sem partir nenhum elemento"""
+    leitor = _InicioDosElementos()
+    leitor.feed(conteudo)
+    leitor.close()
+    # O getpos() do HTMLParser conta linhas só por "\n" (o splitlines também quebraria em \r, \u2028...)
+    inicio_das_linhas = [0]
+    for linha in conteudo.split("\n"):
+        inicio_das_linhas.append(inicio_das_linhas[-1] + len(linha) + 1)
+    return [inicio_das_linhas[linha - 1] + coluna for linha, coluna in leitor.posicoes]
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def secoes_da_previa(conteudo):
+    """HTML da prévia em seções (cache pelo hash do conteúdo)"""
+    if len(conteudo) <= TAMANHO_SECAO:
+        return [MOLDURA_PREVIA.format(conteudo)]
+
+    secoes, inicio = [], 0
+    for corte in _fronteiras(conteudo):
+        if corte - inicio > TAMANHO_SECAO:
+            secoes.append(conteudo[inicio:corte])
+            inicio = corte
+    secoes.append(conteudo[inicio:])
+    return [MOLDURA_PREVIA.format(secao) for secao in secoes if secao]
+
+
+def previa_conteudo():
+    """Renderiza o conteúdo confirmado no campo (ao sair dele ou com Ctrl+Enter)"""
+    conteudo = st.session_state.get("conteudo_input", "")
+    if not conteudo:
+        st.caption("Comece a digitar aqui para ver a pré-visualização...")
+        return
+    for secao in secoes_da_previa(conteudo):
+        st.html(secao)
+
+
+def importar_lote(sheet, pasta_id):
+    """Valida o lote inteiro, sobe as imagens em paralelo e grava tudo num append_rows"""
+    st.header("Importação em lote")
+    st.caption("Posts .md/.html com front-matter (titulo, categoria, tags, imagem, data_agendada) "
+               "ou um manifesto .csv, junto com as imagens — soltos, numa pasta ou num .zip.")
+
+    origem = st.radio("Enviar", ["Arquivos ou .zip", "Pasta"], horizontal=True)
+    enviados = st.file_uploader(
+        "Arquivos do lote",
+        type=["zip", "csv", "md", "markdown", "html", "htm", "png", "jpg", "jpeg", "webp"],
+        accept_multiple_files="directory" if origem == "Pasta" else True,
+        key=f"lote_{origem}",
+    )
+    if not enviados:
+        return
+
+    try:
+        arquivos = importacao.ler_arquivos((arquivo.name, arquivo.getvalue()) for arquivo in enviados)
+        itens = importacao.validar_itens(importacao.montar_itens(arquivos), arquivos)
+    except Exception as e:
+        st.error(f"Não foi possível ler o lote: {e}")
+        return
+    if not itens:
+        st.warning("Nenhum post encontrado no lote.")
+        return
+
+    st.dataframe([{
+        "origem": item["origem"],
+        "titulo": item["titulo"],
+        "categoria": item["categoria"],
+        "data_agendada": item.get("data_agendada", ""),
+        "situação": "; ".join(item["erros"]) or "✅ ok",
+    } for item in itens], hide_index=True)
+
+    invalidos = [item for item in itens if item["erros"]]
+    if invalidos:
+        st.error(f"{len(invalidos)} de {len(itens)} posts com erro. Corrija o lote antes de importar.")
+        return
+
+    if not st.button(f"Importar {len(itens)} posts"):
+        return
+
+    barra = st.progress(0.0, text="Enviando imagens ao Drive...")
+    falhas = 0
+    for n, (item, erro) in enumerate(importacao.enviar_itens(itens, arquivos, pasta_id), start=1):
+        barra.progress(n / len(itens), text=f"{n}/{len(itens)} enviados ao Drive")
+        if erro:
+            falhas += 1
+            st.error(f"❌ {item['origem']}: {erro}")
+        else:
+            st.write(f"✅ {item['titulo']}")
+
+    try:
+        gravados = importacao.gravar_itens(sheet, itens)
+    except Exception as e:
+        st.error(f"Erro ao gravar na planilha: {e}")
+        return
+    invalidar_agendamentos()
+    if falhas:
+        st.warning(f"{gravados} posts agendados; {falhas} falharam no upload e ficaram de fora.")
+    else:
+        st.success(f"✅ {gravados} posts agendados!")
+
 
 def form_page():
     st.title("Agendar Blog (Upload → Drive → Sheets)")
 
     activate_preview = st.toggle("Pré-visualização do Blog", value=False)
-
-    if activate_preview:
-        st.set_page_config(layout="wide")
-    else:
-        st.set_page_config(layout="centered")
+    # O layout fica valendo na sessão: só muda quando o toggle muda
+    layout = "wide" if activate_preview else "centered"
+    if st.session_state.get("layout_pagina") != layout:
+        st.set_page_config(layout=layout)
+        st.session_state["layout_pagina"] = layout
 
 
     services = get_google_services()
@@ -29,37 +172,14 @@ def form_page():
     # ----------------------------------------
 
     # 2. Desempacotamento seguro (só é executado se services não for None)
-    gc = services["gc"]
     drive_service = services["drive"]
 
-    SHEET_NAME = st.secrets["SHEET_NAME"]
     PASTA_ID = st.secrets["PASTA_ID"]
-    sheet = gc.open(SHEET_NAME).get_worksheet(2)
+    sheet = get_aba(2)
 
     def upload_para_drive(uploaded_file, pasta_id=PASTA_ID):
-        file_bytes = uploaded_file.read()
-        media = MediaIoBaseUpload(io.BytesIO(file_bytes), mimetype=uploaded_file.type, resumable=False)
-        
-        metadata = {"name": uploaded_file.name, "parents": [pasta_id]}
-        
-        # ⚠️ Adicione supportsAllDrives=True aqui
-        uploaded = drive_service.files().create(
-            body=metadata,
-            media_body=media,
-            fields="id",
-            supportsAllDrives=True
-        ).execute()
-        
-        file_id = uploaded.get("id")
-
-        # drive_service.permissions().create(
-        #     fileId=file_id,
-        #     body={"role": "reader", "type": "anyone"},
-        #     fields="id",
-        #     supportsAllDrives=True
-        # ).execute()
-
-        return f"https://drive.google.com/uc?id={file_id}"
+        # O UploadedFile já é um arquivo: vai em partes para o Drive, sem .read() inteiro
+        return midia.upload_para_drive(drive_service, uploaded_file, uploaded_file.name, uploaded_file.type, pasta_id)
 
 
     # -------------------------------------------------------------
@@ -81,16 +201,16 @@ def form_page():
         
         # MOVIDO PARA FORA DO FORMULÁRIO: Este widget agora atualiza 
         # a página em tempo real, permitindo a pré-visualização dinâmica.
-        conteudo = st.text_area("Conteúdo (Markdown/HTML) do post", 
+        conteudo = st.text_area("Conteúdo (HTML) do post", 
                                 height=300, 
                                 key="conteudo_input",
-                                help="Use Markdown (e.g., **negrito**, # cabeçalho) para formatação ou cole HTML.")
+                                help="O conteúdo vai como HTML para o editor do blog (ex.: <h2>, <p>, <strong>).")
         
         with st.form("agendar_form"):
-            categoria = st.selectbox("Categoria", ["Tecnologia", "Inovação", "Gestão e Negócios", "Construção Cívil e Segurança", "Sustentabilidade", "Química e Alimentos"])
+            categoria = st.selectbox("Categoria", CATEGORIAS)
             titulo = st.text_input("Título do post")
             tags = st.text_input("Tags (separadas por ;)")
-            imagem_upload = st.file_uploader("Imagem de destaque", type=["png", "jpg", "jpeg"])
+            imagem_upload = st.file_uploader("Imagem de destaque", type=["png", "jpg", "jpeg", "webp"])
             
             # Nota para o usuário, já que o conteúdo está acima
             st.caption("O campo 'Conteúdo' está acima para permitir a pré-visualização em tempo real.")
@@ -112,22 +232,24 @@ def form_page():
         else:
             try:
                 with st.spinner("Fazendo upload e salvando na planilha..."):
-                    imagem_url = upload_para_drive(imagem_upload)
+                    imagem_url, tamanho_original, tamanho_otimizado = upload_para_drive(imagem_upload)
                     
-                    # Codificação do conteúdo
-                    conteudo_encoded = base64.b64encode(conteudo_salvar.encode("utf-8")).decode("utf-8")
+                    # Codificação do conteúdo (comprimido; posts enormes vão para o Drive)
+                    conteudo_encoded = codificar_conteudo(conteudo_salvar, drive_service, PASTA_ID)
                     
-                    linha = [
-                        str(datetime.datetime.now()),
+                    linha = montar_linha(
                         titulo,
                         categoria,
                         tags,
                         imagem_url,
                         conteudo_encoded,
                         f"{data_agendada} {hora_agendada}",
-                        "pendente"
-                    ]
+                        tamanho_original,
+                        tamanho_otimizado
+                    )
+                    garantir_cabecalho(sheet)
                     sheet.append_row(linha)
+                    invalidar_agendamentos()
                     st.success("✅ Post salvo com sucesso!")
             except Exception as e:
                 st.error(f"Erro no upload ou na planilha: {e}")
@@ -139,8 +261,15 @@ def form_page():
 
     if activate_preview and col_preview is not None:
         with col_preview:
-            st.header("Pré-visualização (Markdown/HTML)")
-            
-            conteudo_para_preview = st.session_state.get("conteudo_input", "Comece a digitar aqui para ver a pré-visualização...")
-            
-            st.markdown(conteudo_para_preview, unsafe_allow_html=True)
+            st.header("Pré-visualização (como no editor do blog)")
+            st.caption("A imagem de destaque entra no topo do post na publicação.")
+            previa_conteudo()
+
+
+    # -------------------------------------------------------------
+    # IMPORTAÇÃO EM LOTE
+    # -------------------------------------------------------------
+
+    st.divider()
+    if st.toggle("📦 Importação em lote", value=False):
+        importar_lote(sheet, PASTA_ID)
@@ -0,0 +1,254 @@
+import csv
+import io
+import mimetypes
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timezone
+
+from dateutil import parser
+from PIL import Image
+
+import midia
+from autom import get_drive, get_secret
+from conteudo import codificar_conteudo
+from planilha import CATEGORIAS, garantir_cabecalho, montar_linha
+
+
+# -------------------------------------------------------------------
+# 📦 Importação em lote de agendamentos
+# -------------------------------------------------------------------
+#
+# Aceita um .zip, uma pasta ou vários arquivos soltos com:
+#   - posts .md / .html com front-matter entre "---":
+#         ---
+#         titulo: Meu post
+#         categoria: Tecnologia
+#         tags: a; b
+#         imagem: capa.jpg
+#         data_agendada: 2025-03-10 09:00
+#         ---
+#         <p>Conteúdo...</p>
+#   - ou um manifesto .csv com as colunas titulo, categoria, tags, imagem,
+#     data_agendada e conteudo (HTML) ou arquivo (post do lote).
+#
+# As imagens são referenciadas pelo nome do arquivo dentro do lote.
+
+EXTENSOES_POST = (".md", ".markdown", ".html", ".htm")
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".webp")
+
+# Nomes alternativos aceitos no front-matter / manifesto
+SINONIMOS = {
+    "title": "titulo", "título": "titulo",
+    "category": "categoria",
+    "image": "imagem", "imagem_url": "imagem",
+    "schedule": "data_agendada", "data": "data_agendada", "date": "data_agendada",
+    "content": "conteudo", "conteúdo": "conteudo",
+    "file": "arquivo",
+}
+
+FRONT_MATTER = re.compile(r"\A---\s*\n(.*?)\n---\s*(?:\n|\Z)", re.DOTALL)
+
+
+def get_paralelos_importacao():
+    """IMPORTACAO_PARALELOS: uploads simultâneos ao Drive (padrão 4)"""
+    return max(1, int(get_secret("IMPORTACAO_PARALELOS") or 4))
+
+
+# --- leitura do lote ---------------------------------------------------
+
+def ler_arquivos(enviados):
+    """{nome: bytes} a partir de (nome, bytes) soltos ou de dentro de .zip"""
+    arquivos = {}
+    for nome, dados in enviados:
+        if nome.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(dados)) as pacote:
+                for info in pacote.infolist():
+                    if not info.is_dir() and not os.path.basename(info.filename).startswith("."):
+                        arquivos[os.path.basename(info.filename)] = pacote.read(info)
+        else:
+            arquivos[os.path.basename(nome)] = dados
+    return arquivos
+
+
+def _normalizar(campos):
+    return {SINONIMOS.get(chave.strip().lower(), chave.strip().lower()): valor for chave, valor in campos.items()}
+
+
+def ler_front_matter(texto):
+    """(campos, corpo) de um post com front-matter simples "chave: valor" """
+    achado = FRONT_MATTER.match(texto)
+    if not achado:
+        return {}, texto
+    campos = {}
+    for linha in achado.group(1).splitlines():
+        chave, separador, valor = linha.partition(":")
+        if separador and chave.strip() and not linha.startswith((" ", "#")):
+            valor = valor.strip()
+            if valor.startswith("[") and valor.endswith("]"):
+                valor = "; ".join(parte.strip().strip("'\"") for parte in valor[1:-1].split(",") if parte.strip())
+            campos[chave] = valor.strip("'\"")
+    return _normalizar(campos), texto[achado.end():]
+
+
+def _html(nome, corpo):
+    """Posts .md viram HTML (o editor do blog recebe HTML); .html vai como está"""
+    if not nome.lower().endswith((".md", ".markdown")):
+        return corpo
+    try:
+        import markdown
+    except ImportError:
+        raise ValueError("posts .md precisam do pacote 'markdown' (pip install markdown)")
+    return markdown.markdown(corpo, extensions=["extra"])
+
+
+def _decodificar_texto(dados):
+    return dados.decode("utf-8-sig")
+
+
+def montar_itens(arquivos):
+    """Itens do lote (um dict por post), ainda sem validar"""
+    itens = []
+    manifestos = [nome for nome in arquivos if nome.lower().endswith(".csv")]
+
+    if manifestos:
+        for manifesto in manifestos:
+            leitor = csv.DictReader(io.StringIO(_decodificar_texto(arquivos[manifesto])))
+            for numero, linha in enumerate(leitor, start=2):
+                campos = _normalizar({k: (v or "").strip() for k, v in linha.items() if k})
+                item = {"origem": f"{manifesto}:{numero}", **campos, "erros": []}
+                if not item.get("conteudo") and item.get("arquivo"):
+                    nome = os.path.basename(item["arquivo"])
+                    if nome in arquivos:
+                        extras, corpo = ler_front_matter(_decodificar_texto(arquivos[nome]))
+                        item = {**extras, **{k: v for k, v in item.items() if v}, "erros": item["erros"]}
+                        try:
+                            item["conteudo"] = _html(nome, corpo)
+                        except ValueError as e:
+                            item["erros"].append(str(e))
+                    else:
+                        item["erros"].append(f"arquivo '{item['arquivo']}' não está no lote")
+                itens.append(item)
+        return itens
+
+    for nome in sorted(arquivos):
+        if not nome.lower().endswith(EXTENSOES_POST):
+            continue
+        campos, corpo = ler_front_matter(_decodificar_texto(arquivos[nome]))
+        item = {"origem": nome, **campos, "erros": []}
+        try:
+            item["conteudo"] = _html(nome, corpo)
+        except ValueError as e:
+            item["erros"].append(str(e))
+        itens.append(item)
+    return itens
+
+
+# --- validação -----------------------------------------------------------
+
+def converter_data(valor):
+    """data_agendada do lote no formato da planilha ("%Y-%m-%d %H:%M:%S", sem fuso = UTC).
+
+    Datas com o ano na frente (2026-03-10) são lidas como ano-mês-dia; as
+    demais como dia/mês/ano, como no formulário. Com fuso, vão para UTC.
+    """
+    texto = str(valor or "").strip()
+    data = parser.parse(texto, dayfirst=not re.match(r"\d{4}\D", texto))
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc)
+    return data.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def validar_itens(itens, arquivos):
+    """Confere todos os itens antes de qualquer upload; os erros ficam em item["erros"]"""
+    for item in itens:
+        erros = item["erros"]
+        erro_de_leitura = bool(erros)
+        item["titulo"] = (item.get("titulo") or "").strip()
+        item["categoria"] = (item.get("categoria") or "").strip()
+        item["tags"] = (item.get("tags") or "").strip()
+        item["conteudo"] = (item.get("conteudo") or "").strip()
+
+        if not item["titulo"]:
+            erros.append("sem título")
+        if item["categoria"] not in CATEGORIAS:
+            erros.append(f"categoria inválida: {item['categoria']!r}")
+        if not item["conteudo"] and not erro_de_leitura:
+            erros.append("sem conteúdo")
+
+        try:
+            item["data_agendada"] = converter_data(item.get("data_agendada"))
+        except (ValueError, OverflowError):
+            erros.append(f"data_agendada inválida: {item.get('data_agendada') or ''!r}")
+
+        imagem = (item.get("imagem") or "").strip()
+        item["imagem"] = imagem
+        if imagem.startswith("https://drive.google.com/"):
+            continue  # já está no Drive
+        nome = os.path.basename(imagem)
+        if not imagem:
+            erros.append("sem imagem de destaque")
+        elif nome not in arquivos or not nome.lower().endswith(EXTENSOES_IMAGEM):
+            erros.append(f"imagem '{imagem}' não está no lote")
+        else:
+            try:
+                Image.open(io.BytesIO(arquivos[nome])).verify()
+            except Exception:
+                erros.append(f"imagem '{imagem}' não abre")
+
+    titulos = [item["titulo"] for item in itens]
+    for item in itens:
+        if item["titulo"] and titulos.count(item["titulo"]) > 1:
+            item["erros"].append("título repetido no lote")
+    return itens
+
+
+# --- envio -----------------------------------------------------------------
+
+def _enviar_item(item, arquivos, pasta_id):
+    drive_service = get_drive()  # cliente da própria thread
+    imagem = item["imagem"]
+    tamanho_original = tamanho_otimizado = ""
+    if not imagem.startswith("https://"):
+        nome = os.path.basename(imagem)
+        mimetype = mimetypes.guess_type(nome)[0] or "application/octet-stream"
+        imagem, tamanho_original, tamanho_otimizado = midia.upload_para_drive(
+            drive_service, io.BytesIO(arquivos[nome]), nome, mimetype, pasta_id
+        )
+    return montar_linha(
+        item["titulo"],
+        item["categoria"],
+        item["tags"],
+        imagem,
+        codificar_conteudo(item["conteudo"], drive_service, pasta_id),
+        item["data_agendada"],
+        tamanho_original,
+        tamanho_otimizado,
+    )
+
+
+def enviar_itens(itens, arquivos, pasta_id, paralelos=None):
+    """Sobe imagens (e conteúdos grandes) ao Drive em paralelo.
+
+    Gera (item, erro) conforme cada um termina; a linha pronta fica em item["linha"].
+    """
+    paralelos = paralelos or get_paralelos_importacao()
+    with ThreadPoolExecutor(max_workers=paralelos, thread_name_prefix="importacao") as executor:
+        futuros = {executor.submit(_enviar_item, item, arquivos, pasta_id): item for item in itens}
+        for futuro in as_completed(futuros):
+            item = futuros[futuro]
+            try:
+                item["linha"] = futuro.result()
+                yield item, None
+            except Exception as e:
+                yield item, e
+
+
+def gravar_itens(sheet, itens):
+    """Todas as linhas prontas num único append_rows, na ordem do lote"""
+    linhas = [item["linha"] for item in itens if item.get("linha")]
+    if linhas:
+        garantir_cabecalho(sheet)
+        sheet.append_rows(linhas)
+    return len(linhas)
@@ -0,0 +1,212 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from dateutil import parser
+from planilha import COL_DATA_AGENDADA, COL_STATUS, rowcol_to_a1
+
+
+# -------------------------------------------------------------------
+# 🗂️ Índice local dos agendamentos (SQLite)
+# -------------------------------------------------------------------
+
+# Status que não voltam a ser publicados: as linhas até a primeira "aberta"
+# não precisam ser relidas a cada sincronização.
+STATUS_FINAIS = ("publicado",)
+
+# "publicando" entra porque a reserva de um trabalhador que caiu vence e a linha volta
+STATUS_A_PUBLICAR = ("pendente", "publicando")
+
+# De tempos em tempos relê todas as linhas, para pegar edições manuais antigas
+INTERVALO_SINCRONIZACAO_COMPLETA = 24 * 3600
+
+
+def converter_data_agendada(valor):
+    """data_agendada da planilha em UTC (sem fuso é tratada como UTC, como sempre foi)"""
+    data = parser.isoparse(str(valor).strip())
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return data.astimezone(timezone.utc)
+
+
+class IndiceAgendamentos:
+    """Linha, status e data_agendada de cada post, guardados entre execuções.
+
+    A sincronização lê só as colunas de data e status, e só a partir da
+    primeira linha ainda não publicada (as novas vêm junto). O conteúdo
+    completo só é buscado para as linhas vencidas, então o custo da
+    execução depende dos posts a publicar e não do tamanho do histórico.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS posts (
+                linha INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                data_agendada TEXT
+            );
+            CREATE INDEX IF NOT EXISTS posts_status_data ON posts (status, data_agendada);
+            CREATE TABLE IF NOT EXISTS meta (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+    def fechar(self):
+        self.conexao.close()
+
+    # --- meta ----------------------------------------------------------
+
+    def _meta(self, chave, padrao=None):
+        linha = self.conexao.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else padrao
+
+    def _gravar_meta(self, chave, valor):
+        self.conexao.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", (chave, str(valor)))
+
+    @property
+    def cabecalho(self):
+        valor = self._meta("cabecalho")
+        return valor.split("\t") if valor else None
+
+    # --- versão da planilha (detecção de mudanças) -------------------
+
+    @property
+    def planilha_id(self):
+        return self._meta("planilha_id")
+
+    @property
+    def planilha_modificada(self):
+        """modifiedTime do Drive na última sincronização, ou None se desconhecido"""
+        return self._meta("planilha_modificada") or None
+
+    def registrar_versao(self, planilha_id, modificada):
+        """Guarda o id e o modifiedTime que a última sincronização já refletem"""
+        with self.conexao:
+            self._gravar_meta("planilha_id", planilha_id)
+            self._gravar_meta("planilha_modificada", modificada or "")
+
+    def remetentes_em_cache(self):
+        """Remetentes lidos nesta mesma versão da planilha, ou None"""
+        versao = self.planilha_modificada
+        if versao is None or self._meta("remetentes_versao") != versao:
+            return None
+        return json.loads(self._meta("remetentes", "[]"))
+
+    def guardar_remetentes(self, remetentes):
+        versao = self.planilha_modificada
+        if versao is None:
+            return
+        with self.conexao:
+            self._gravar_meta("remetentes", json.dumps(list(remetentes)))
+            self._gravar_meta("remetentes_versao", versao)
+
+    # --- sincronização -------------------------------------------------
+
+    def sincronizar(self, sheet, completo=None):
+        """Atualiza o índice com a planilha e devolve quantas linhas foram lidas."""
+        agora = time.time()
+        if completo is None:
+            ultima = float(self._meta("sincronizacao_completa", 0))
+            completo = agora - ultima > INTERVALO_SINCRONIZACAO_COMPLETA or self.cabecalho is None
+
+        if completo:
+            self._gravar_meta("cabecalho", "\t".join(sheet.row_values(1)))
+        primeira = 2 if completo else int(self._meta("primeira_linha_aberta", 2))
+
+        inicio = rowcol_to_a1(primeira, COL_DATA_AGENDADA)
+        fim = rowcol_to_a1(primeira, COL_STATUS).rstrip("0123456789")
+        valores = sheet.get_values(f"{inicio}:{fim}")
+
+        registros = []
+        for deslocamento, valor in enumerate(valores):
+            data_agendada = valor[0] if len(valor) > 0 else ""
+            status = valor[COL_STATUS - COL_DATA_AGENDADA].strip().lower() if len(valor) > 1 else ""
+            try:
+                data_iso = converter_data_agendada(data_agendada).isoformat(timespec="seconds")
+            except (ValueError, OverflowError):
+                data_iso = None
+            registros.append((primeira + deslocamento, status, data_iso))
+
+        with self.conexao:
+            # Linhas apagadas no fim da planilha somem do índice
+            self.conexao.execute("DELETE FROM posts WHERE linha >= ?", (primeira + len(valores),))
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO posts (linha, status, data_agendada) VALUES (?, ?, ?)", registros
+            )
+            self._atualizar_primeira_aberta()
+            if completo:
+                self._gravar_meta("sincronizacao_completa", agora)
+
+        return len(valores)
+
+    def _atualizar_primeira_aberta(self):
+        marcadores = ",".join("?" * len(STATUS_FINAIS))
+        linha = self.conexao.execute(
+            f"SELECT MIN(linha) FROM posts WHERE status NOT IN ({marcadores})", STATUS_FINAIS
+        ).fetchone()[0]
+        if linha is None:
+            linha = (self.conexao.execute("SELECT MAX(linha) FROM posts").fetchone()[0] or 1) + 1
+        self._gravar_meta("primeira_linha_aberta", linha)
+
+    # --- consultas -------------------------------------------------------
+
+    def vencidos(self, agora=None):
+        """Linhas a publicar com data_agendada já alcançada"""
+        agora = agora or datetime.now(timezone.utc)
+        return [linha for (linha,) in self.conexao.execute(
+            "SELECT linha FROM posts WHERE status IN (?, ?) AND data_agendada <= ? ORDER BY data_agendada, linha",
+            (*STATUS_A_PUBLICAR, agora.astimezone(timezone.utc).isoformat(timespec="seconds")),
+        )]
+
+    def proximo_agendamento(self, agora=None):
+        """Data (datetime UTC) do próximo post a publicar ainda no futuro, ou None"""
+        agora = agora or datetime.now(timezone.utc)
+        valor = self.conexao.execute(
+            "SELECT MIN(data_agendada) FROM posts WHERE status IN (?, ?) AND data_agendada > ?",
+            (*STATUS_A_PUBLICAR, agora.astimezone(timezone.utc).isoformat(timespec="seconds")),
+        ).fetchone()[0]
+        return datetime.fromisoformat(valor) if valor else None
+
+    def agendados(self):
+        """(data UTC, linha) de todos os posts a publicar com data válida"""
+        return [(datetime.fromisoformat(data), linha) for linha, data in self.conexao.execute(
+            "SELECT linha, data_agendada FROM posts WHERE status IN (?, ?) AND data_agendada IS NOT NULL",
+            STATUS_A_PUBLICAR,
+        )]
+
+    def marcar(self, linhas, status):
+        """Reflete no índice um status já gravado na planilha"""
+        with self.conexao:
+            self.conexao.executemany("UPDATE posts SET status = ? WHERE linha = ?", [(status, l) for l in linhas])
+            self._atualizar_primeira_aberta()
+
+    def carregar_posts(self, sheet, linhas):
+        """Linhas completas (como no get_all_records) numa única chamada batch_get"""
+        if not linhas:
+            return []
+        cabecalho = self.cabecalho
+        ultima_coluna = rowcol_to_a1(1, len(cabecalho)).rstrip("0123456789")
+        intervalos = [f"A{linha}:{ultima_coluna}{linha}" for linha in linhas]
+
+        posts = []
+        for linha, valores in zip(linhas, sheet.batch_get(intervalos)):
+            valores = valores[0] if valores else []
+            posts.append((linha, {
+                chave: (valores[c] if c < len(valores) else "") for c, chave in enumerate(cabecalho)
+            }))
+        return posts
+
+
+def abrir_indice():
+    return IndiceAgendamentos(os.getenv("ARQUIVO_INDICE", "indice_agendamentos.sqlite3"))
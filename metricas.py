@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+# -------------------------------------------------------------------
+# ⏱️ Tempo por fase de uma execução
+# -------------------------------------------------------------------
+
+class Metricas:
+    """Registra quanto tempo cada fase levou (auth, leitura da planilha, Chrome, login...).
+
+    Uso:
+        with metricas.fase("login"):
+            ...
+
+    As fases ficam em memória e vão para um arquivo JSONL no `salvar()`, uma
+    linha por fase mais uma linha de resumo da execução.
+    """
+
+    def __init__(self):
+        self.execucao = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.fases = []
+        self._inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def reiniciar(self):
+        """Começa uma nova execução (ex.: cada cenário do benchmark)"""
+        with self._lock:
+            self.execucao = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            self.fases = []
+            self._inicio = time.perf_counter()
+
+    @contextmanager
+    def fase(self, nome, **atributos):
+        inicio = time.perf_counter()
+        registro = {
+            "execucao": self.execucao,
+            "fase": nome,
+            "inicio": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "thread": threading.current_thread().name,
+            **atributos,
+        }
+        try:
+            yield registro
+            registro["ok"] = True
+        except BaseException as e:
+            registro["ok"] = False
+            registro["erro"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registro["duracao"] = round(time.perf_counter() - inicio, 4)
+            with self._lock:
+                self.fases.append(registro)
+
+    def totais(self):
+        """{fase: {"vezes", "total", "maximo"}} ordenado da fase mais cara para a mais barata"""
+        totais = {}
+        with self._lock:
+            fases = list(self.fases)
+        for registro in fases:
+            total = totais.setdefault(registro["fase"], {"vezes": 0, "total": 0.0, "maximo": 0.0})
+            total["vezes"] += 1
+            total["total"] += registro["duracao"]
+            total["maximo"] = max(total["maximo"], registro["duracao"])
+        return dict(sorted(totais.items(), key=lambda item: item[1]["total"], reverse=True))
+
+    def resumo(self, quantidade=5):
+        """Texto com as fases mais lentas, para o log do fim da execução"""
+        linhas = [f"Fases mais lentas (execução de {time.perf_counter() - self._inicio:.1f}s):"]
+        for nome, total in list(self.totais().items())[:quantidade]:
+            linhas.append(
+                f"  {nome}: {total['total']:.2f}s em {total['vezes']}x (máx. {total['maximo']:.2f}s)"
+            )
+        return "\n".join(linhas)
+
+    def salvar(self, caminho, **extras):
+        """Acrescenta as fases e o resumo da execução (com `extras`) ao arquivo JSONL"""
+        with self._lock:
+            fases = list(self.fases)
+        with open(caminho, "a", encoding="utf-8") as arquivo:
+            for registro in fases:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            arquivo.write(json.dumps({
+                "execucao": self.execucao,
+                "fase": "execucao",
+                "duracao": round(time.perf_counter() - self._inicio, 4),
+                "totais": self.totais(),
+                **extras,
+            }, ensure_ascii=False) + "\n")
+
+
+# Instância da execução atual, compartilhada pelos módulos
+metricas = Metricas()
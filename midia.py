@@ -0,0 +1,106 @@
+import os
+import tempfile
+
+from googleapiclient.http import MediaIoBaseUpload
+from PIL import Image, ImageOps
+
+from api_google import executar
+from autom import get_secret
+
+
+# -------------------------------------------------------------------
+# 🖼️ Otimização da imagem de destaque antes do upload
+# -------------------------------------------------------------------
+
+# Acima disso o arquivo temporário sai da memória e vai para o disco
+LIMITE_MEMORIA = 8 * 1024 * 1024
+
+FORMATOS = {
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "png": ("PNG", "image/png", ".png"),
+}
+
+
+def tamanho_do_arquivo(arquivo):
+    posicao = arquivo.tell()
+    arquivo.seek(0, os.SEEK_END)
+    tamanho = arquivo.tell()
+    arquivo.seek(posicao)
+    return tamanho
+
+
+def otimizar_imagem(arquivo, nome, mimetype):
+    """Reduz e recomprime a imagem conforme IMAGEM_LADO_MAXIMO / IMAGEM_FORMATO / IMAGEM_QUALIDADE.
+
+    Devolve (arquivo, nome, mimetype) já posicionado no início. Se a versão
+    otimizada não ficar menor, o original é devolvido como veio.
+    """
+    lado_maximo = int(get_secret("IMAGEM_LADO_MAXIMO") or 1920)
+    formato = (get_secret("IMAGEM_FORMATO") or "original").strip().lower()
+    qualidade = int(get_secret("IMAGEM_QUALIDADE") or 85)
+
+    arquivo.seek(0)
+    imagem = Image.open(arquivo)
+    if formato == "original":
+        formato = "jpeg" if imagem.format == "JPEG" else "webp" if imagem.format == "WEBP" else "png"
+    if formato not in FORMATOS:
+        raise ValueError(f"IMAGEM_FORMATO inválido: {formato!r}")
+    formato_pil, mimetype_novo, extensao = FORMATOS[formato]
+
+    # Em JPEG o draft já decodifica reduzido, sem carregar a foto inteira na memória
+    imagem.draft("RGB", (lado_maximo, lado_maximo))
+    imagem = ImageOps.exif_transpose(imagem)
+    imagem.thumbnail((lado_maximo, lado_maximo))
+    if formato_pil == "JPEG" and imagem.mode not in ("RGB", "L"):
+        imagem = imagem.convert("RGB")
+
+    opcoes = {"optimize": True}
+    if formato_pil == "JPEG":
+        opcoes.update(quality=qualidade, progressive=True)
+    elif formato_pil == "WEBP":
+        opcoes = {"quality": qualidade, "method": 6}
+
+    otimizado = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA)
+    imagem.save(otimizado, formato_pil, **opcoes)
+
+    arquivo.seek(0)
+    if otimizado.tell() >= tamanho_do_arquivo(arquivo):
+        otimizado.close()
+        return arquivo, nome, mimetype
+
+    otimizado.seek(0)
+    return otimizado, os.path.splitext(nome)[0] + extensao, mimetype_novo
+
+
+# -------------------------------------------------------------------
+# ☁️ Upload para o Drive em partes (resumable)
+# -------------------------------------------------------------------
+
+def upload_para_drive(drive_service, arquivo, nome, mimetype, pasta_id, otimizar=True):
+    """Envia a imagem ao Drive em blocos, sem ler o arquivo inteiro na memória.
+
+    Devolve (url, tamanho_original, tamanho_enviado) em bytes.
+    """
+    tamanho_original = tamanho_do_arquivo(arquivo)
+    if otimizar:
+        arquivo, nome, mimetype = otimizar_imagem(arquivo, nome, mimetype)
+    tamanho_enviado = tamanho_do_arquivo(arquivo)
+
+    media = MediaIoBaseUpload(arquivo, mimetype=mimetype, chunksize=1024 * 1024, resumable=True)
+    metadata = {"name": nome, "parents": [pasta_id]}
+
+    # ⚠️ Adicione supportsAllDrives=True aqui
+    requisicao = drive_service.files().create(
+        body=metadata,
+        media_body=media,
+        fields="id",
+        supportsAllDrives=True
+    )
+    # Cada parte é repetida sozinha em caso de falha (o upload resumable continua de onde parou)
+    uploaded = None
+    while uploaded is None:
+        _, uploaded = executar("drive", requisicao.next_chunk)
+
+    file_id = uploaded.get("id")
+    return f"https://drive.google.com/uc?id={file_id}", tamanho_original, tamanho_enviado
@@ -0,0 +1,120 @@
+import queue
+import random
+import smtplib
+import threading
+import time
+
+from loguru import logger
+
+from autom import abrir_smtp, get_secret, montar_email
+
+
+# -------------------------------------------------------------------
+# 📬 Envio de notificações em segundo plano
+# -------------------------------------------------------------------
+
+_FIM = object()
+
+
+def _falha_transitoria(erro):
+    if isinstance(erro, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return 400 <= erro.smtp_code < 500
+    # Todo SMTPException também é OSError: os demais (destinatários recusados,
+    # extensão não suportada...) são permanentes e não valem nova tentativa
+    if isinstance(erro, smtplib.SMTPException):
+        return False
+    return isinstance(erro, OSError)
+
+
+class Notificador:
+    """Fila de e-mails de publicação enviada por uma thread com uma única conexão SMTP.
+
+    `notificar()` só enfileira e volta na hora, então um handshake lento não
+    segura o próximo post. Com EMAIL_RESUMO ligado, os posts da execução vão
+    num único e-mail enviado no `fechar()`. Falhas transitórias (4xx, conexão
+    caída) são repetidas com backoff; depois das tentativas o título fica em
+    `falhas`.
+    """
+
+    def __init__(self, remetentes, resumo=None, tentativas=3):
+        if resumo is None:
+            resumo = str(get_secret("EMAIL_RESUMO") or "0").strip().lower() in ("1", "true", "sim")
+        self.remetentes = list(remetentes)
+        self.resumo = resumo
+        self.tentativas = tentativas
+        self.enviados = []
+        self.falhas = []
+        self._fila = queue.Queue()
+        self._smtp = None
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+    def notificar(self, titulo):
+        if not self.remetentes:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._trabalhar, name="notificador", daemon=True)
+            self._thread.start()
+        self._fila.put(titulo)
+
+    def fechar(self):
+        """Espera a fila esvaziar (e o resumo sair) e encerra a conexão SMTP."""
+        if self._thread is None:
+            return
+        self._fila.put(_FIM)
+        self._thread.join()
+        self._thread = None
+
+    # --- thread de envio ---------------------------------------------
+
+    def _trabalhar(self):
+        acumulados = []
+        try:
+            while True:
+                titulo = self._fila.get()
+                if titulo is _FIM:
+                    break
+                if self.resumo:
+                    acumulados.append(titulo)
+                else:
+                    self._enviar([titulo])
+
+            if acumulados:
+                self._enviar(acumulados)
+        finally:
+            self._desconectar()
+
+    def _enviar(self, titulos):
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                if self._smtp is None:
+                    self._smtp = abrir_smtp()
+                self._smtp.send_message(montar_email(titulos, self.remetentes))
+                self.enviados.extend(titulos)
+                logger.success(f"✅ Email enviado com sucesso! ({', '.join(titulos)})")
+                return
+            except Exception as e:
+                self._desconectar()
+                if not _falha_transitoria(e) or tentativa == self.tentativas:
+                    self.falhas.extend(titulos)
+                    logger.opt(exception=e).error(f"Erro ao enviar email ({', '.join(titulos)}): {e}")
+                    return
+                espera = 2 ** tentativa + random.uniform(0, 1)
+                logger.warning(f"Falha temporária no envio do email, nova tentativa em {espera:.1f}s: {e}")
+                time.sleep(espera)
+
+    def _desconectar(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass  # conexão já caiu
+        self._smtp = None
@@ -0,0 +1,250 @@
+import atexit
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+
+from api_google import fichas_adiantadas
+
+
+# -------------------------------------------------------------------
+# 📋 Layout da aba de posts agendados (worksheet 2)
+# -------------------------------------------------------------------
+
+COL_DATA_AGENDADA = 7  # G
+COL_STATUS = 8  # H
+
+# Colunas preenchidas na publicação, logo após o status (I, J, K)
+COLUNAS_PUBLICACAO = ["publicado_em", "post_id", "duracao_publicacao"]
+
+# Tamanhos (bytes) da imagem de destaque enviada pelo formulário (L, M)
+COLUNAS_IMAGEM = ["tamanho_original", "tamanho_otimizado"]
+
+# Reserva da linha por quem está publicando: id do trabalhador e validade (N, O)
+COLUNAS_RESERVA = ["trabalhador", "reserva_ate"]
+
+COLUNAS_EXTRAS = COLUNAS_PUBLICACAO + COLUNAS_IMAGEM + COLUNAS_RESERVA
+COL_TRABALHADOR = COL_STATUS + len(COLUNAS_PUBLICACAO + COLUNAS_IMAGEM) + 1  # N
+
+# Categorias cadastradas no blog (o publicador escolhe a opção pelo texto)
+CATEGORIAS = ["Tecnologia", "Inovação", "Gestão e Negócios", "Construção Cívil e Segurança", "Sustentabilidade", "Química e Alimentos"]
+
+_cabecalhos_gravados = set()
+
+
+def rowcol_to_a1(linha, coluna):
+    """(linha, coluna) em notação A1, como o gspread.utils.rowcol_to_a1.
+
+    Fica aqui para o worker não importar o gspread (e o google-auth junto)
+    só para montar intervalos quando não há nada a publicar.
+    """
+    letras = ""
+    while coluna > 0:
+        coluna, resto = divmod(coluna - 1, 26)
+        letras = chr(ord("A") + resto) + letras
+    return f"{letras}{linha}"
+
+
+def garantir_cabecalho(sheet):
+    """Grava o cabeçalho das colunas extras (uma vez por processo).
+
+    Sem ele o get_all_records() recusa a planilha: as colunas preenchidas sem
+    nome viram cabeçalhos "" duplicados.
+    """
+    if sheet.id in _cabecalhos_gravados:
+        return
+    inicio = rowcol_to_a1(1, COL_STATUS + 1)
+    fim = rowcol_to_a1(1, COL_STATUS + len(COLUNAS_EXTRAS))
+    sheet.update([COLUNAS_EXTRAS], f"{inicio}:{fim}")
+    _cabecalhos_gravados.add(sheet.id)
+
+
+def montar_linha(titulo, categoria, tags, imagem_url, conteudo_encoded, data_agendada,
+                 tamanho_original="", tamanho_otimizado=""):
+    """Linha nova da aba de agendamentos, já com as colunas extras"""
+    return [
+        str(datetime.now()),
+        titulo,
+        categoria,
+        tags,
+        imagem_url,
+        conteudo_encoded,
+        data_agendada,
+        "pendente",
+        *[""] * len(COLUNAS_PUBLICACAO),
+        tamanho_original,
+        tamanho_otimizado,
+        *[""] * len(COLUNAS_RESERVA),
+    ]
+
+
+def linha_da_planilha(indice):
+    """Converte o índice de get_all_records() na linha real (cabeçalho + base 1)"""
+    return indice + 2
+
+
+# -------------------------------------------------------------------
+# 📝 Escrita em lote do status das publicações
+# -------------------------------------------------------------------
+
+class RegistroPublicacoes:
+    """Acumula as mudanças de status de uma execução e grava tudo num único batch_update.
+
+    Cada `marcar()` só guarda a linha em memória; `gravar()` manda todas de uma
+    vez. Se o processo cair no meio do backlog, o atexit grava o que já foi
+    publicado antes de sair.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self._linhas = {}
+        self._lock = threading.Lock()
+        atexit.register(self.gravar)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.gravar()
+        atexit.unregister(self.gravar)
+
+    def marcar(self, linha, status, post_id="", duracao=None):
+        """Registra o status de uma linha da planilha (número real, não o índice).
+
+        A reserva da linha (se houver) é liberada junto.
+        """
+        valores = [
+            status,
+            datetime.now(timezone.utc).isoformat(timespec="seconds") if status == "publicado" else "",
+            str(post_id or ""),
+            f"{duracao:.1f}" if duracao is not None else "",
+        ]
+        with self._lock:
+            self._linhas[linha] = valores
+
+    def gravar(self):
+        with self._lock:
+            if not self._linhas:
+                return
+            linhas = self._linhas
+            self._linhas = {}
+
+        ultima_coluna = COL_STATUS + len(COLUNAS_PUBLICACAO)
+        dados = [{
+            # O cabeçalho vai junto para as colunas novas existirem em planilhas antigas
+            "range": f"{rowcol_to_a1(1, COL_STATUS + 1)}:{rowcol_to_a1(1, COL_STATUS + len(COLUNAS_EXTRAS))}",
+            "values": [COLUNAS_EXTRAS],
+        }]
+        for linha, valores in sorted(linhas.items()):
+            dados.append({
+                "range": f"{rowcol_to_a1(linha, COL_STATUS)}:{rowcol_to_a1(linha, ultima_coluna)}",
+                "values": [valores],
+            })
+            dados.append({
+                "range": _intervalo_reserva(linha),
+                "values": [[""] * len(COLUNAS_RESERVA)],
+            })
+
+        try:
+            self.sheet.batch_update(dados)
+        except Exception:
+            # Devolve as linhas para a próxima tentativa (ex.: a do atexit)
+            with self._lock:
+                for linha, valores in linhas.items():
+                    self._linhas.setdefault(linha, valores)
+            raise
+
+
+# -------------------------------------------------------------------
+# 🔒 Reserva de linhas entre trabalhadores (cron, daemon, "Postar agora")
+# -------------------------------------------------------------------
+
+# Tempo entre gravar a reserva e relê-la: quem escreveu por último fica com a linha
+PAUSA_CONFIRMACAO = 2.0
+
+
+def id_trabalhador():
+    """TRABALHADOR_ID, ou host:pid do processo"""
+    return os.getenv("TRABALHADOR_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _intervalo_reserva(linha):
+    return f"{rowcol_to_a1(linha, COL_TRABALHADOR)}:{rowcol_to_a1(linha, COL_TRABALHADOR + len(COLUNAS_RESERVA) - 1)}"
+
+
+def reserva_expirada(reserva_ate, agora=None):
+    """Reserva vazia, ilegível ou vencida (trabalhador que caiu no meio)"""
+    agora = agora or datetime.now(timezone.utc)
+    try:
+        return datetime.fromisoformat(str(reserva_ate).strip()) <= agora
+    except ValueError:
+        return True
+
+
+def _ler_reservas(sheet, linhas):
+    """(status, trabalhador, reserva_ate) de cada linha, num único batch_get"""
+    fim = rowcol_to_a1(1, COL_TRABALHADOR + len(COLUNAS_RESERVA) - 1).rstrip("0123456789")
+    intervalos = [f"{rowcol_to_a1(linha, COL_STATUS)}:{fim}{linha}" for linha in linhas]
+    estados = []
+    for valores in sheet.batch_get(intervalos):
+        valores = (valores[0] if valores else []) + [""] * (COL_TRABALHADOR + len(COLUNAS_RESERVA))
+        estados.append((
+            str(valores[0]).strip().lower(),
+            str(valores[COL_TRABALHADOR - COL_STATUS]).strip(),
+            str(valores[COL_TRABALHADOR - COL_STATUS + 1]).strip(),
+        ))
+    return estados
+
+
+def reservar_linhas(sheet, linhas, trabalhador, duracao, pausa=PAUSA_CONFIRMACAO):
+    """Reserva para `trabalhador` as linhas livres e devolve as que ficaram com ele.
+
+    O Sheets não tem escrita condicional, então a reserva é "grava e confere":
+    as linhas pendentes (ou com reserva vencida) recebem status "publicando",
+    o id do trabalhador e a validade; depois de `pausa` segundos são relidas e
+    só ficam as que ainda têm o nosso id. Quem gravou por último ganha, e como
+    todos releem depois da pausa, só um publica. Se a nossa leitura e escrita
+    demorarem mais que a pausa, outro trabalhador pode já ter conferido: a
+    reserva é abandonada e as linhas só voltam quando ela vencer. Não dá para
+    devolvê-las a "pendente": o nosso id pode ter sobrescrito o de quem já
+    conferiu e está publicando, e a linha sairia duas vezes. Quem publica
+    grava o status e limpa a reserva no fim de qualquer jeito.
+    """
+    if not linhas:
+        return []
+
+    # A cota da leitura e da escrita é paga antes de começar a contar o tempo:
+    # esperar por ela entre as duas também deixaria a reserva atrasada
+    with fichas_adiantadas("sheets_leitura", "sheets_escrita"):
+        inicio = time.monotonic()
+        agora = datetime.now(timezone.utc)
+        livres = [
+            linha for linha, (status, _, reserva_ate) in zip(linhas, _ler_reservas(sheet, linhas))
+            if status == "pendente" or (status == "publicando" and reserva_expirada(reserva_ate, agora))
+        ]
+        if not livres:
+            return []
+
+        validade = (agora + timedelta(seconds=duracao)).isoformat(timespec="seconds")
+        dados = []
+        for linha in livres:
+            dados.append({"range": rowcol_to_a1(linha, COL_STATUS), "values": [["publicando"]]})
+            dados.append({"range": _intervalo_reserva(linha), "values": [[trabalhador, validade]]})
+        sheet.batch_update(dados)
+        decorrido = time.monotonic() - inicio
+
+    if decorrido > pausa:
+        logger.warning(
+            f"Reserva de {len(livres)} linha(s) demorou {decorrido:.1f}s (mais que {pausa}s); abandonada. "
+            f"As linhas voltam quando ela vencer, em até {duracao}s."
+        )
+        return []
+
+    time.sleep(pausa)
+    return [
+        linha for linha, (status, dono, _) in zip(livres, _ler_reservas(sheet, livres))
+        if status == "publicando" and dono == trabalhador
+    ]
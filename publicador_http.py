@@ -0,0 +1,305 @@
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from autom import (
+    conteudo_com_imagem, get_modo_publicacao, get_secret, get_url_blog,
+    url_imagem_no_corpo,
+)
+from cache_imagens import imagem_local
+from metricas import metricas
+
+
+# -------------------------------------------------------------------
+# 🧩 Leitura dos formulários e da listagem do admin
+# -------------------------------------------------------------------
+
+class _FormulariosHTML(HTMLParser):
+    """Extrai os formulários (action, method e campos) e as tabelas de uma página."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.formularios = []
+        self.tabelas = []
+        self._form = None
+        self._select = None
+        self._opcao = None
+        self._textarea = None
+        self._linha = None
+        self._celula = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == "form":
+            self._form = {
+                "action": attrs.get("action") or "",
+                "method": (attrs.get("method") or "get").lower(),
+                "campos": {},
+                "opcoes": {},
+            }
+            self.formularios.append(self._form)
+
+        elif tag == "input" and self._form is not None and attrs.get("name"):
+            tipo = (attrs.get("type") or "text").lower()
+            if tipo in ("file", "submit", "button", "image", "reset"):
+                return
+            if tipo in ("checkbox", "radio") and "checked" not in attrs:
+                return
+            self._form["campos"][attrs["name"]] = attrs.get("value") or ""
+
+        elif tag == "select" and self._form is not None and attrs.get("name"):
+            self._select = attrs["name"]
+            self._form["opcoes"][self._select] = []
+
+        elif tag == "option" and self._select is not None:
+            self._opcao = {"value": attrs.get("value"), "texto": "", "selecionada": "selected" in attrs}
+
+        elif tag == "textarea" and self._form is not None and attrs.get("name"):
+            self._textarea = attrs["name"]
+            self._form["campos"][self._textarea] = ""
+
+        elif tag == "table":
+            self.tabelas.append([])
+
+        elif tag == "tr" and self.tabelas:
+            self._linha = []
+            self.tabelas[-1].append(self._linha)
+
+        elif tag in ("td", "th") and self._linha is not None:
+            self._celula = {"texto": "", "img": None, "th": tag == "th"}
+            self._linha.append(self._celula)
+
+        elif tag == "img" and self._celula is not None and self._celula["img"] is None:
+            self._celula["img"] = attrs.get("src")
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._form = None
+        elif tag == "option" and self._opcao is not None:
+            opcao = self._opcao
+            opcao["texto"] = opcao["texto"].strip()
+            if opcao["value"] is None:
+                opcao["value"] = opcao["texto"]
+            self._form["opcoes"][self._select].append(opcao)
+            if opcao["selecionada"] or self._select not in self._form["campos"]:
+                self._form["campos"][self._select] = opcao["value"]
+            self._opcao = None
+        elif tag == "select":
+            self._select = None
+        elif tag == "textarea":
+            self._textarea = None
+        elif tag in ("td", "th"):
+            self._celula = None
+        elif tag == "tr":
+            self._linha = None
+
+    def handle_data(self, data):
+        if self._opcao is not None:
+            self._opcao["texto"] += data
+        elif self._textarea is not None:
+            self._form["campos"][self._textarea] += data
+        elif self._celula is not None:
+            self._celula["texto"] += data
+
+
+def _ler_pagina(resposta):
+    if "charset" not in resposta.headers.get("Content-Type", "").lower():
+        # Sem charset o requests assume ISO-8859-1 e quebra os acentos das categorias
+        resposta.encoding = resposta.apparent_encoding
+    parser = _FormulariosHTML()
+    parser.feed(resposta.text)
+    parser.close()
+    return parser
+
+
+def _formulario_com(pagina, campo):
+    for form in pagina.formularios:
+        if campo in form["campos"] or campo in form["opcoes"]:
+            return form
+    raise RuntimeError(f"Formulário com o campo '{campo}' não encontrado na página.")
+
+
+# -------------------------------------------------------------------
+# 🌐 Publicador sem navegador (requests)
+# -------------------------------------------------------------------
+
+class PublicadorHTTP:
+    """Mesmo fluxo do PublicadorBlog, mas com chamadas HTTP numa requests.Session.
+
+    Faz login uma vez, reaproveita as conexões do pool e refaz o login se
+    o admin redirecionar para /admin/login. Não precisa de Chrome.
+    """
+
+    TIMEOUT = 30
+
+    def __init__(self):
+        url_base = get_url_blog()
+        self.URL_LOGIN = url_base + "/admin/login"
+        self.URL_NOVO_POST = url_base + "/admin/blog/show"
+        self.URL_LISTA_POSTS = url_base + "/admin/blog"
+        self.URL_EDITAR_POST = url_base + "/admin/blog/{}/edit"
+        self.sessao = None
+        self.logado = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+    def iniciar(self):
+        if self.sessao is not None:
+            return
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+        self.logado = False
+
+    def fechar(self):
+        if self.sessao is None:
+            return
+        self.sessao.close()
+        self.sessao = None
+        self.logado = False
+
+    def login(self):
+        usuario = get_secret("BLOG_USER")
+        senha = get_secret("BLOG_PASS")
+
+        if not usuario or not senha:
+            raise RuntimeError("Credenciais do blog não configuradas.")
+
+        self.iniciar()
+        with metricas.fase("login", backend="http"):
+            resposta = self._get(self.URL_LOGIN)
+            form = _formulario_com(_ler_pagina(resposta), "email")
+            dados = dict(form["campos"], email=usuario, password=senha)
+
+            resposta = self._enviar(resposta, form, dados)
+        if self._pagina_de_login(resposta):
+            raise RuntimeError("Login no admin do blog recusado.")
+        self.logado = True
+
+    def sessao_expirada(self, resposta):
+        return self.sessao is None or self._pagina_de_login(resposta)
+
+    def abrir(self, url):
+        """GET numa página do admin, refazendo o login se a sessão tiver caído."""
+        if not self.logado:
+            self.login()
+        resposta = self._get(url)
+        if self.sessao_expirada(resposta):
+            self.login()
+            resposta = self._get(url)
+        return resposta
+
+    def publicar(self, categoria, titulo, tags, conteudo, img_url):
+        """Publica um post e devolve o número dele no admin."""
+        try:
+            return self._publicar(categoria, titulo, tags, conteudo, img_url)
+        except Exception:
+            # Descarta cookies e conexões de uma sessão em estado desconhecido
+            self.fechar()
+            raise
+
+    def _publicar(self, categoria, titulo, tags, conteudo, img_url):
+        # No modo "unica" a imagem já entra no corpo e o post é salvo uma vez só
+        imagem_no_corpo = url_imagem_no_corpo(img_url) if get_modo_publicacao() == "unica" else None
+
+        # Cadastro do post com a imagem de destaque
+        resposta = self.abrir(self.URL_NOVO_POST)
+        form = _formulario_com(_ler_pagina(resposta), "title")
+        dados = dict(form["campos"])
+        dados.update({
+            "category_id": self._valor_opcao(form, "category_id", categoria),
+            "title": titulo,
+            "tags": tags,
+            "content": conteudo_com_imagem(imagem_no_corpo, conteudo) if imagem_no_corpo else conteudo,
+        })
+
+        with imagem_local(img_url) as caminho_imagem, open(caminho_imagem, "rb") as imagem:
+            arquivos = {"file": (os.path.basename(caminho_imagem), imagem)}
+            with metricas.fase("envio_post", backend="http"):
+                resposta = self._enviar(resposta, form, dados, arquivos)
+
+        # Número e imagem do post recém-criado na listagem
+        if "<table" not in resposta.text:
+            resposta = self.abrir(self.URL_LISTA_POSTS)
+        numero, imagem_upload_site = self._post_mais_recente(_ler_pagina(resposta), resposta.url, titulo)
+
+        if imagem_no_corpo is None:
+            # Edição: imagem enviada ao site no topo do conteúdo
+            resposta = self.abrir(self.URL_EDITAR_POST.format(numero))
+            form = _formulario_com(_ler_pagina(resposta), "content")
+            dados = dict(form["campos"], content=conteudo_com_imagem(imagem_upload_site, conteudo))
+            with metricas.fase("edicao_post", backend="http"):
+                self._enviar(resposta, form, dados)
+
+        print(f"✅ Post '{titulo}' publicado com sucesso!")
+        return numero
+
+    # --- auxiliares HTTP ---------------------------------------------
+
+    def _get(self, url):
+        resposta = self.sessao.get(url, timeout=self.TIMEOUT)
+        resposta.raise_for_status()
+        return resposta
+
+    def _enviar(self, resposta, form, dados, arquivos=None):
+        url = urljoin(resposta.url, form["action"]) if form["action"] else resposta.url
+        metodo = "post" if form["method"] == "post" or arquivos else form["method"]
+        resposta = self.sessao.request(metodo, url, data=dados, files=arquivos, timeout=self.TIMEOUT)
+        resposta.raise_for_status()
+        return resposta
+
+    def _pagina_de_login(self, resposta):
+        return "/admin/login" in resposta.url
+
+    @staticmethod
+    def _valor_opcao(form, campo, texto):
+        """Equivalente ao send_keys num <select>: escolhe a opção pelo texto visível."""
+        for opcao in form["opcoes"].get(campo, []):
+            if opcao["texto"].strip().lower() == str(texto).strip().lower():
+                return opcao["value"]
+        for opcao in form["opcoes"].get(campo, []):
+            if opcao["value"] == str(texto):
+                return opcao["value"]
+        raise RuntimeError(f"Opção '{texto}' não encontrada em '{campo}'.")
+
+    @staticmethod
+    def _post_mais_recente(pagina, url_pagina, titulo):
+        """Linha do post recém-criado na listagem.
+
+        Prefere a de maior número entre as que mostram o título (com publicadores
+        em paralelo a linha mais nova pode ser de outro post); sem título na
+        listagem, fica com a de maior número. A ordem do HTML não é garantida
+        sem o DataTables.
+        """
+        melhor = None
+        melhor_com_titulo = None
+        for tabela in pagina.tabelas:
+            for linha in tabela:
+                if len(linha) < 2 or linha[0]["th"]:
+                    continue
+                numero = linha[0]["texto"].strip()
+                if not re.fullmatch(r"\d+", numero) or not linha[1]["img"]:
+                    continue
+                candidato = (numero, urljoin(url_pagina, linha[1]["img"]))
+                if melhor is None or int(numero) > int(melhor[0]):
+                    melhor = candidato
+                if any(celula["texto"].strip() == titulo.strip() for celula in linha):
+                    if melhor_com_titulo is None or int(numero) > int(melhor_com_titulo[0]):
+                        melhor_com_titulo = candidato
+
+        if melhor_com_titulo is not None:
+            return melhor_com_titulo
+        if melhor is None:
+            raise RuntimeError("Post recém-criado não encontrado na listagem do admin.")
+        return melhor
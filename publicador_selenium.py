@@ -0,0 +1,282 @@
+import atexit
+import os
+import shutil
+import socket
+import tempfile
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+
+from autom import (
+    conteudo_com_imagem, get_modo_publicacao, get_secret, get_url_blog,
+    url_imagem_no_corpo,
+)
+from cache_imagens import imagem_local
+from metricas import metricas
+
+
+# -------------------------------------------------------------------
+# 🤖 Sessão de publicação (Chrome + login reaproveitados)
+# -------------------------------------------------------------------
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# -------------------------------------------------------------------
+# 🪶 Perfil enxuto do Chrome (CHROME_PERFIL=enxuto)
+# -------------------------------------------------------------------
+
+# Nada disso é preciso para preencher e salvar o formulário do admin: imagens
+# (a listagem só precisa do src), fontes e scripts de terceiros
+BLOQUEIOS_ENXUTO = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*connect.facebook.net*", "*hotjar.com*",
+]
+
+ARGUMENTOS_ENXUTO = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-features=Translate,OptimizationHints,MediaRouter",
+]
+
+
+def get_perfil_chrome():
+    """CHROME_PERFIL: "padrao" (como sempre foi) ou "enxuto" """
+    perfil = (get_secret("CHROME_PERFIL") or "padrao").strip().lower()
+    if perfil not in ("padrao", "enxuto"):
+        raise ValueError(f"CHROME_PERFIL inválido: {perfil!r}")
+    return perfil
+
+
+def _pasta_de_perfil():
+    """Perfil temporário na memória (/dev/shm) quando existe, senão no disco"""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+    return tempfile.mkdtemp(prefix="chrome-publicador-", dir=base)
+
+
+def _pico_rss_kb(pid):
+    """Pico de memória (VmHWM) do processo e de todos os descendentes, em KB (só Linux)"""
+    filhos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as arquivo:
+                ppid = int(arquivo.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        filhos.setdefault(ppid, []).append(int(entrada))
+
+    total, pendentes = 0, [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        pendentes.extend(filhos.get(atual, []))
+        try:
+            with open(f"/proc/{atual}/status") as arquivo:
+                for linha in arquivo:
+                    if linha.startswith("VmHWM:"):
+                        total += int(linha.split()[1])
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class PublicadorBlog:
+    """Mantém um Chrome headless logado no admin para publicar vários posts.
+
+    O navegador e o login só acontecem na primeira publicação; se a sessão
+    expirar (o admin redireciona para /admin/login), o login é refeito.
+    Use como context manager para garantir o encerramento do Chrome.
+    """
+
+    def __init__(self):
+        url_base = get_url_blog()
+        self.URL_LOGIN = url_base + "/admin/login"
+        self.URL_NOVO_POST = url_base + "/admin/blog/show"
+        self.URL_EDITAR_POST = url_base + "/admin/blog/{}/edit"
+        self.perfil = get_perfil_chrome()
+        self.pasta_perfil = None
+        self.driver = None
+        self.wait = None
+        self.logado = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+    def iniciar(self):
+        if self.driver is not None:
+            return
+
+        options = Options()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        # Porta própria por instância: com publicadores em paralelo a 9222 fixa colide
+        options.add_argument(f"--remote-debugging-port={_porta_livre()}")
+
+        if self.perfil == "enxuto":
+            # Não espera imagens e folhas de estilo: os passos esperam pelos próprios elementos
+            options.page_load_strategy = "eager"
+            for argumento in ARGUMENTOS_ENXUTO:
+                options.add_argument(argumento)
+            # Perfil e cache em tmpfs, com o cache limitado para não crescer na memória
+            self.pasta_perfil = _pasta_de_perfil()
+            options.add_argument(f"--user-data-dir={self.pasta_perfil}")
+            options.add_argument(f"--disk-cache-size={int(get_secret('CHROME_CACHE_MB') or 32) * 1024 * 1024}")
+
+        service = Service("/usr/bin/chromedriver")
+        with metricas.fase("chrome_inicio", perfil=self.perfil):
+            self.driver = webdriver.Chrome(service=service, options=options)
+            if self.perfil == "enxuto":
+                extras = [p.strip() for p in (get_secret("CHROME_BLOQUEAR") or "").split(",") if p.strip()]
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOQUEIOS_ENXUTO + extras})
+        self.wait = WebDriverWait(self.driver, 10)
+        self.logado = False
+        # Garante que o Chrome não fique órfão se o processo terminar sem fechar()
+        atexit.register(self.fechar)
+
+    def fechar(self):
+        if self.driver is None:
+            return
+        try:
+            self.driver.quit()
+        except Exception:
+            pass  # o Chrome pode já ter morrido
+        atexit.unregister(self.fechar)
+        if self.pasta_perfil:
+            shutil.rmtree(self.pasta_perfil, ignore_errors=True)
+            self.pasta_perfil = None
+        self.driver = None
+        self.wait = None
+        self.logado = False
+
+    def medir_memoria(self):
+        """Pico de RSS (MB) do chromedriver + Chrome até agora, ou None fora do Linux"""
+        processo = getattr(getattr(self.driver, "service", None), "process", None)
+        if processo is None or not os.path.isdir("/proc"):
+            return None
+        return round(_pico_rss_kb(processo.pid) / 1024, 1)
+
+    def login(self):
+        usuario = get_secret("BLOG_USER")
+        senha = get_secret("BLOG_PASS")
+
+        if not usuario or not senha:
+            raise RuntimeError("Credenciais do blog não configuradas.")
+
+        self.iniciar()
+        driver, wait = self.driver, self.wait
+
+        with metricas.fase("login", backend="selenium"):
+            driver.get(self.URL_LOGIN)
+            wait.until(EC.presence_of_element_located((By.NAME, "email"))).send_keys(usuario)
+            wait.until(EC.presence_of_element_located((By.NAME, "password"))).send_keys(senha)
+            wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']"))).click()
+            wait.until(EC.url_contains("admin"))
+            wait.until(lambda d: "/admin/login" not in d.current_url)
+        self.logado = True
+
+    def sessao_expirada(self):
+        return self.driver is None or "/admin/login" in self.driver.current_url
+
+    def abrir(self, url):
+        """Abre uma página do admin, refazendo o login se a sessão tiver caído."""
+        if not self.logado:
+            self.login()
+        self.driver.get(url)
+        if self.sessao_expirada():
+            self.login()
+            self.driver.get(url)
+
+    def _linha_do_post(self, titulo):
+        """Linha do post na listagem: a primeira com o título, senão a primeira da tabela.
+
+        Com publicadores em paralelo a primeira linha pode ser o post de outra sessão.
+        """
+        primeira = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#DataTables_Table_0 tbody tr:nth-child(1)")))
+        for linha in self.driver.find_elements(By.CSS_SELECTOR, "#DataTables_Table_0 tbody tr"):
+            if any(td.text.strip() == titulo.strip() for td in linha.find_elements(By.TAG_NAME, "td")):
+                return linha
+        return primeira
+
+    def publicar(self, categoria, titulo, tags, conteudo, img_url):
+        """Publica um post e devolve o número dele no admin."""
+        try:
+            return self._publicar(categoria, titulo, tags, conteudo, img_url)
+        except Exception:
+            # Um Chrome em estado desconhecido contamina os próximos posts
+            self.fechar()
+            raise
+
+    def _preencher_conteudo(self, conteudo):
+        """Põe o HTML no Summernote e no textarea e espera o textarea confirmar o valor."""
+        driver = self.driver
+        elemento = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.note-editable.panel-body[contenteditable='true']")))
+        driver.execute_script("arguments[0].innerHTML = arguments[1];", elemento, conteudo)
+        driver.execute_script("""document.querySelector('textarea[name="content"]').value = arguments[0];""", conteudo)
+        # O textarea devolve as quebras de linha como "\n" (CRLF de arquivos do Windows vira LF)
+        esperado = conteudo.replace("\r\n", "\n").replace("\r", "\n")
+        self.wait.until(lambda d: d.execute_script(
+            """return document.querySelector('textarea[name="content"]').value;""") == esperado)
+
+    def _salvar(self, fase):
+        """Clica em salvar e espera a listagem do blog carregar."""
+        driver, wait = self.driver, self.wait
+        botao = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "div.pull-right > button.btn-primary[type='submit']")))
+        driver.execute_script("arguments[0].scrollIntoView(true);", botao)
+        wait.until(EC.element_to_be_clickable(botao))
+        with metricas.fase(fase, backend="selenium"):
+            botao.click()
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#DataTables_Table_0 tbody tr.odd")))
+
+    def _publicar(self, categoria, titulo, tags, conteudo, img_url):
+        # No modo "unica" a imagem já entra no corpo e o post é salvo uma vez só
+        imagem_no_corpo = url_imagem_no_corpo(img_url) if get_modo_publicacao() == "unica" else None
+
+        self.abrir(self.URL_NOVO_POST)
+        wait = self.wait
+
+        wait.until(EC.presence_of_element_located((By.NAME, "category_id"))).send_keys(categoria)
+        wait.until(EC.presence_of_element_located((By.NAME, "title"))).send_keys(titulo)
+        wait.until(EC.presence_of_element_located((By.NAME, "tags"))).send_keys(tags)
+
+        with imagem_local(img_url) as caminho_imagem:
+            # O Chrome precisa do caminho absoluto (o cache fica numa pasta relativa)
+            wait.until(EC.presence_of_element_located((By.NAME, "file"))).send_keys(os.path.abspath(caminho_imagem))
+            self._preencher_conteudo(conteudo_com_imagem(imagem_no_corpo, conteudo) if imagem_no_corpo else conteudo)
+            self._salvar("envio_post")
+
+        linha = self._linha_do_post(titulo)
+        numero = linha.find_element(By.TAG_NAME, "td").text
+
+        if imagem_no_corpo is None:
+            # Fluxo de duas etapas: a imagem enviada ao site vai para o topo do conteúdo
+            imagem_td = linha.find_elements(By.TAG_NAME, "td")[1]
+            imagem_upload_site = imagem_td.find_element(By.TAG_NAME, "img").get_attribute("src")
+            self.abrir(self.URL_EDITAR_POST.format(numero))
+            self._preencher_conteudo(conteudo_com_imagem(imagem_upload_site, conteudo))
+            self._salvar("edicao_post")
+
+        print(f"✅ Post '{titulo}' publicado com sucesso!")
+        return numero
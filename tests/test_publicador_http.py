@@ -0,0 +1,77 @@
+"""PublicadorHTTP contra o admin falso de benchmark/servicos_falsos.py (sem rede externa)."""
+import pytest
+
+from autom import limpar_google_services, usar_google_services
+from benchmark.servicos_falsos import ServidorAdmin, ServidorDrive
+from publicador_http import PublicadorHTTP
+
+IMAGEM = b"\xff\xd8\xff\xe0" + b"\x00" * 1_000 + b"\xff\xd9"
+
+
+@pytest.fixture
+def admin():
+    servidor = ServidorAdmin()
+    # Ordem e números diferentes dos da lista do projeto: a categoria só acerta pelo texto
+    servidor.categorias = list(reversed(ServidorAdmin.CATEGORIAS))
+    servidor.token = "token-da-pagina"
+    # Posts antigos: o número devolvido não pode ser um palpite
+    servidor.ultimo_numero = 41
+    yield servidor
+    servidor.fechar()
+
+
+@pytest.fixture
+def imagem_url(monkeypatch, tmp_path):
+    drive = ServidorDrive()
+    # Sem credenciais do Google a imagem vem pelo link público
+    usar_google_services(None)
+    monkeypatch.setenv("PASTA_CACHE_IMAGENS", str(tmp_path / "imagens"))
+    yield drive.adicionar("capa", IMAGEM)
+    limpar_google_services()
+    drive.fechar()
+
+
+@pytest.fixture
+def publicador(admin, imagem_url, monkeypatch):
+    monkeypatch.setenv("BLOG_URL", admin.url)
+    monkeypatch.setenv("BLOG_USER", "teste@exemplo.com")
+    monkeypatch.setenv("BLOG_PASS", "senha")
+    monkeypatch.setenv("MODO_PUBLICACAO", "duas_etapas")
+    with PublicadorHTTP() as publicador:
+        yield publicador
+
+
+def test_publica_com_token_categoria_e_imagem(admin, imagem_url, publicador):
+    numero = publicador.publicar("Inovação", "Post de teste", "a;b", "<p>Corpo</p>", imagem_url)
+
+    assert numero == "42"
+    post = admin.posts[42]
+    assert post["token"] == "token-da-pagina"
+    assert post["title"] == "Post de teste"
+    assert post["tags"] == "a;b"
+    assert admin.categorias[int(post["category_id"]) - 1] == "Inovação"
+    assert post["imagem_bytes"] == len(IMAGEM)
+    # Edição: a imagem enviada ao site vai no topo do conteúdo
+    assert admin.edicoes == 1
+    assert post["content"].startswith(f"<img src={admin.url}/uploads/42.jpg>")
+    assert post["content"].endswith("<p>Corpo</p>")
+
+
+def test_refaz_login_quando_a_sessao_cai(admin, imagem_url, publicador):
+    publicador.publicar("Tecnologia", "Primeiro", "", "<p>1</p>", imagem_url)
+    assert admin.logins == 1
+
+    # O admin invalida o cookie da sessão
+    admin.sessao = "sessao-nova"
+    numero = publicador.publicar("Tecnologia", "Segundo", "", "<p>2</p>", imagem_url)
+
+    assert admin.logins == 2
+    assert numero == "43"
+    assert admin.posts[43]["title"] == "Segundo"
+    assert admin.posts[43]["content"].startswith(f"<img src={admin.url}/uploads/43.jpg>")
+
+
+def test_categoria_inexistente(admin, imagem_url, publicador):
+    with pytest.raises(RuntimeError, match="não encontrada"):
+        publicador.publicar("Culinária", "Sem categoria", "", "<p>x</p>", imagem_url)
+    assert admin.posts == {}